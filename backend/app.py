@@ -5,9 +5,10 @@ Main application file with Flask setup, CORS, and route registration.
 
 from flask import Flask, jsonify
 from flask_cors import CORS
-from config.settings import Config
-from config.database import init_db, test_db_connection
-from routes import auth_bp, project_bp
+
+# Settings, database and routes are imported inside the functions below: spawned PDF
+# export workers re-import the main script, and under `python app.py` that is this
+# module, so importing it must not load secrets or build the app
 
 
 def create_app():
@@ -17,6 +18,9 @@ def create_app():
     Returns:
         Flask app instance
     """
+    from config.settings import Config
+    from routes import auth_bp, project_bp
+    
     # Create Flask app
     app = Flask(__name__)
     
@@ -81,8 +85,14 @@ def create_app():
     return app
 
 
-# Create app instance for Gunicorn
-app = create_app()
+def __getattr__(name):
+    """Create the app instance for Gunicorn (`app:app`) on first access."""
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    global app
+    app = create_app()
+    return app
 
 
 def main():
@@ -90,6 +100,9 @@ def main():
     Main entry point for the application.
     Initializes database and starts Flask server.
     """
+    from config.settings import Config
+    from config.database import init_db, test_db_connection
+    
     print("=" * 60)
     print("CodeDocs AI - Backend Server")
     print("=" * 60)
@@ -112,8 +125,8 @@ def main():
         print(f"[FAILED] Database initialization failed: {e}")
         return
     
-    # Use the global app instance
     print("\n[3/3] Starting Flask application...")
+    app = create_app()
     
     print("\n" + "=" * 60)
     print("[SUCCESS] Server ready!")
@@ -4,6 +4,7 @@ Loads environment variables and provides configuration classes.
 """
 
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -125,6 +126,11 @@ class Config:
     # Processing settings
     ANALYSIS_BATCH_SIZE = 10  # Files to analyze at once
     MAX_FILE_SIZE_FOR_ANALYSIS = 1024 * 1024  # 1MB max per file for analysis
+    # Persistent Claude result cache (per-user, created owner-only)
+    ANALYSIS_CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR') or os.path.join(
+        os.getenv('XDG_CACHE_HOME') or tempfile.gettempdir(),
+        f"codedocs-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}"
+    )
     
     # Redis settings (for background tasks)
     REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
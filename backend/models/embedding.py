@@ -3,9 +3,24 @@ Embedding model for storing vector embeddings for RAG.
 """
 
 from config.database import get_db_cursor
+from psycopg2.extras import execute_values
 import json
 
 
+# pgvector stores float32 components; 9 significant digits round-trip float32 exactly,
+# so longer float64 reprs only add bytes to every vector literal sent to the database
+_FLOAT32_FORMAT = '{:.9g}'.format
+
+
+def _to_pgvector(vector):
+    """Format a sequence of floats as a pgvector literal."""
+    return '[' + ','.join(map(_FLOAT32_FORMAT, vector)) + ']'
+
+
+# Rows per INSERT statement in bulk_create (execute_values defaults to 100)
+_INSERT_PAGE_SIZE = 500
+
+
 class Embedding:
     """Model for managing vector embeddings for RAG system."""
     
@@ -26,7 +41,7 @@ class Embedding:
         metadata_json = json.dumps(metadata) if metadata else None
         
         # Convert list to pgvector format
-        vector_str = '[' + ','.join(map(str, embedding_vector)) + ']'
+        vector_str = _to_pgvector(embedding_vector)
         
         with get_db_cursor(commit=True) as cursor:
             cursor.execute("""
@@ -48,6 +63,44 @@ class Embedding:
             result = dict(embedding)
             return result
     
+    @staticmethod
+    def bulk_create(project_id, rows):
+        """
+        Create many embedding records in a single INSERT.
+        
+        Args:
+            project_id: UUID of the project
+            rows: List of {content, embedding_vector, metadata} dicts
+            
+        Returns:
+            int: Number of embeddings created
+        """
+        if not rows:
+            return 0
+        
+        values = []
+        for row in rows:
+            content = row['content']
+            metadata = row.get('metadata') or {}
+            values.append((
+                project_id,
+                content,
+                _to_pgvector(row['embedding_vector']),
+                metadata.get('chunk_index', 0),
+                metadata.get('section_type', ''),
+                metadata.get('section_title', ''),
+                metadata.get('token_count', len(content.split())),
+                len(content)
+            ))
+        
+        with get_db_cursor(commit=True) as cursor:
+            execute_values(cursor, """
+                INSERT INTO document_chunks (project_id, content, embedding, chunk_index, section_type, section_title, token_count, char_count)
+                VALUES %s
+            """, values, template="(%s, %s, %s::vector, %s, %s, %s, %s, %s)", page_size=_INSERT_PAGE_SIZE)
+            
+            return len(values)
+    
     @staticmethod
     def find_similar(project_id, query_vector, limit=5):
         """
@@ -62,9 +115,11 @@ class Embedding:
             list: List of similar embeddings with similarity scores
         """
         # Convert query vector to pgvector format
-        vector_str = '[' + ','.join(map(str, query_vector)) + ']'
+        vector_str = _to_pgvector(query_vector)
         
         with get_db_cursor() as cursor:
+            # Send and parse the query vector once; each row's distance is computed once
+            # and ordered on directly so pgvector can still use its index
             cursor.execute("""
                 SELECT 
                     id,
@@ -73,18 +128,52 @@ class Embedding:
                     section_type,
                     section_title,
                     chunk_index,
-                    1 - (embedding <=> %s::vector) as similarity
+                    embedding <=> %s::vector as distance
                 FROM document_chunks
                 WHERE project_id = %s
-                ORDER BY embedding <=> %s::vector
+                ORDER BY distance
                 LIMIT %s
-            """, (vector_str, project_id, vector_str, limit))
+            """, (vector_str, project_id, limit))
             
             results = cursor.fetchall()
-            embeddings = [dict(row) for row in results]
+            embeddings = []
+            for row in results:
+                embedding = dict(row)
+                embedding['similarity'] = 1 - embedding.pop('distance')
+                embeddings.append(embedding)
             
             return embeddings
     
+    @staticmethod
+    def get_content_hashes(project_id):
+        """
+        Get the MD5 digest of each stored embedding's content, computed in the database.
+        
+        Args:
+            project_id: UUID of the project
+            
+        Returns:
+            list: List of (id, content_md5) tuples
+        """
+        with get_db_cursor() as cursor:
+            cursor.execute("""
+                SELECT id, md5(content) as content_md5
+                FROM document_chunks
+                WHERE project_id = %s
+            """, (project_id,))
+            
+            return [(row['id'], row['content_md5']) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def delete_by_ids(ids):
+        """Delete embeddings by id."""
+        if not ids:
+            return 0
+        
+        with get_db_cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM document_chunks WHERE id = ANY(%s::uuid[])", (list(ids),))
+            return cursor.rowcount
+    
     @staticmethod
     def delete_by_project_id(project_id):
         """Delete all embeddings for a project."""
@@ -11,6 +11,20 @@ from config.database import get_db_cursor
 class UserQuota:
     """Model for managing user daily quotas."""
     
+    @staticmethod
+    def get_reset_time():
+        """
+        Get the next quota reset time (midnight GMT+4).
+        
+        Returns:
+            datetime: Next midnight in GMT+4
+        """
+        gmt_plus_4 = pytz.timezone('Etc/GMT-4')
+        current_time = datetime.now(gmt_plus_4)
+        return (current_time + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+    
     @staticmethod
     def get_user_quota(user_id):
         """
@@ -112,14 +126,7 @@ class UserQuota:
         has_quota = projects_created < max_projects
         remaining = max(0, max_projects - projects_created)
         
-        # Calculate reset time (midnight GMT+4)
-        gmt_plus_4 = pytz.timezone('Etc/GMT-4')
-        current_time = datetime.now(gmt_plus_4)
-        next_midnight = (current_time + timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-        
-        return has_quota, remaining, next_midnight
+        return has_quota, remaining, UserQuota.get_reset_time()
     
     @staticmethod
     def get_quota_stats(user_id):
@@ -133,15 +140,16 @@ class UserQuota:
             dict: Quota statistics including current, max, remaining, and reset time
         """
         max_projects = 3
-        has_quota, remaining, reset_time = UserQuota.check_quota_available(user_id, max_projects)
+        # Single quota lookup serves both the count and the availability check
         quota_info = UserQuota.get_user_quota(user_id)
+        projects_created = quota_info['projects_created_today']
         
         return {
-            'projects_created_today': quota_info['projects_created_today'],
+            'projects_created_today': projects_created,
             'max_projects_per_day': max_projects,
-            'remaining_quota': remaining,
-            'has_quota': has_quota,
-            'quota_reset_at': reset_time.isoformat(),
+            'remaining_quota': max(0, max_projects - projects_created),
+            'has_quota': projects_created < max_projects,
+            'quota_reset_at': UserQuota.get_reset_time().isoformat(),
             'timezone': 'GMT+4'
         }
     
@@ -239,14 +247,7 @@ class UserQuota:
         has_quota = messages_sent < max_messages
         remaining = max(0, max_messages - messages_sent)
         
-        # Calculate reset time (midnight GMT+4)
-        gmt_plus_4 = pytz.timezone('Etc/GMT-4')
-        current_time = datetime.now(gmt_plus_4)
-        next_midnight = (current_time + timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-        
-        return has_quota, remaining, next_midnight
+        return has_quota, remaining, UserQuota.get_reset_time()
     
     @staticmethod
     def get_message_quota_stats(user_id):
@@ -260,15 +261,16 @@ class UserQuota:
             dict: Message quota statistics including current, max, remaining, and reset time
         """
         max_messages = 5
-        has_quota, remaining, reset_time = UserQuota.check_message_quota_available(user_id, max_messages)
+        # Single quota lookup serves both the count and the availability check
         quota_info = UserQuota.get_user_quota(user_id)
+        messages_sent = quota_info['messages_sent_today']
         
         return {
-            'messages_sent_today': quota_info['messages_sent_today'],
+            'messages_sent_today': messages_sent,
             'max_messages_per_day': max_messages,
-            'remaining_quota': remaining,
-            'has_quota': has_quota,
-            'quota_reset_at': reset_time.isoformat(),
+            'remaining_quota': max(0, max_messages - messages_sent),
+            'has_quota': messages_sent < max_messages,
+            'quota_reset_at': UserQuota.get_reset_time().isoformat(),
             'timezone': 'GMT+4'
         }
 
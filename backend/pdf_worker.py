@@ -0,0 +1,244 @@
+"""
+PDF rendering entry point for export worker processes.
+
+Kept outside the app's packages on purpose: a worker unpickles render_pdf by
+importing this module, and importing anything under services/, routes/ or
+config/ would pull in the whole app (settings, secrets, clients) in every worker.
+Only the standard library is imported here; WeasyPrint is imported on first render.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+
+# CSS styling for PDF (parsed once per worker by _load_weasyprint)
+_PDF_STYLESHEET = """
+    @page {
+        size: A4;
+        margin: 2cm;
+        @top-center {
+            content: string(project-name);
+            font-size: 10pt;
+            color: #666;
+        }
+        @bottom-center {
+            content: "Page " counter(page) " of " counter(pages);
+            font-size: 10pt;
+            color: #666;
+        }
+    }
+    
+    body {
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        line-height: 1.6;
+        color: #333;
+        max-width: 100%;
+    }
+    
+    .header {
+        text-align: center;
+        margin-bottom: 30px;
+    }
+    
+    .header h1 {
+        font-size: 32pt;
+        color: #1e40af;
+        margin-bottom: 10px;
+        string-set: project-name content();
+    }
+    
+    .header .date {
+        font-size: 11pt;
+        color: #666;
+        font-style: italic;
+    }
+    
+    .header hr {
+        border: none;
+        border-top: 2px solid #3b82f6;
+        margin: 20px 0;
+    }
+    
+    .content h1 {
+        font-size: 24pt;
+        color: #1e40af;
+        margin-top: 30px;
+        margin-bottom: 15px;
+        border-bottom: 2px solid #3b82f6;
+        padding-bottom: 5px;
+    }
+    
+    .content h2 {
+        font-size: 20pt;
+        color: #1e40af;
+        margin-top: 25px;
+        margin-bottom: 12px;
+    }
+    
+    .content h3 {
+        font-size: 16pt;
+        color: #2563eb;
+        margin-top: 20px;
+        margin-bottom: 10px;
+    }
+    
+    .content h4 {
+        font-size: 14pt;
+        color: #2563eb;
+        margin-top: 15px;
+        margin-bottom: 8px;
+    }
+    
+    .content p {
+        margin-bottom: 12px;
+        text-align: justify;
+    }
+    
+    .content ul, .content ol {
+        margin-left: 25px;
+        margin-bottom: 15px;
+    }
+    
+    .content li {
+        margin-bottom: 5px;
+    }
+    
+    .content code {
+        background-color: #f3f4f6;
+        padding: 2px 6px;
+        border-radius: 3px;
+        font-family: 'Courier New', monospace;
+        font-size: 10pt;
+        color: #dc2626;
+    }
+    
+    .content pre {
+        background-color: #1e293b;
+        color: #e2e8f0;
+        padding: 15px;
+        border-radius: 5px;
+        overflow-x: auto;
+        margin-bottom: 15px;
+        font-family: 'Courier New', monospace;
+        font-size: 9pt;
+        line-height: 1.4;
+    }
+    
+    .content pre code {
+        background-color: transparent;
+        padding: 0;
+        color: inherit;
+    }
+    
+    .content blockquote {
+        border-left: 4px solid #3b82f6;
+        padding-left: 15px;
+        margin-left: 0;
+        color: #666;
+        font-style: italic;
+    }
+    
+    .content table {
+        width: 100%;
+        border-collapse: collapse;
+        margin-bottom: 20px;
+    }
+    
+    .content table th {
+        background-color: #3b82f6;
+        color: white;
+        padding: 10px;
+        text-align: left;
+        font-weight: bold;
+    }
+    
+    .content table td {
+        border: 1px solid #ddd;
+        padding: 8px;
+    }
+    
+    .content table tr:nth-child(even) {
+        background-color: #f9fafb;
+    }
+    
+    .content a {
+        color: #3b82f6;
+        text-decoration: none;
+    }
+    
+    .content a:hover {
+        text-decoration: underline;
+    }
+    
+    /* Page break control */
+    h1, h2, h3 {
+        page-break-after: avoid;
+    }
+    
+    pre, table {
+        page-break-inside: avoid;
+    }
+"""
+
+# Parsed documents per worker, keyed by HTML hash, least recently used evicted first.
+# Bounded by count because a parsed document is many times the size of its HTML
+_PARSED_HTML_CACHE = OrderedDict()
+_PARSED_HTML_CACHE_SIZE = 4
+
+
+@lru_cache(maxsize=1)
+def _load_weasyprint():
+    """
+    Import WeasyPrint and parse the PDF stylesheet, once per process.
+    
+    Returns:
+        tuple: (HTML class, stylesheet, font configuration), or None if WeasyPrint
+               is not available (requires GTK libraries on Windows)
+    """
+    try:
+        from weasyprint import HTML, CSS
+        from weasyprint.text.fonts import FontConfiguration
+    except (ImportError, OSError) as e:
+        print(f"⚠️ WeasyPrint not available: {e}")
+        print("📝 PDF export will not work. Markdown and DOCX exports are still available.")
+        return None
+    
+    # Font lookup state shared by the stylesheet and every render
+    font_config = FontConfiguration()
+    return HTML, CSS(string=_PDF_STYLESHEET, font_config=font_config), font_config
+
+
+def _parse_pdf_html(html_class, full_html):
+    """Parse an HTML document for rendering; re-exports of the same document skip the parse."""
+    key = blake2b(full_html.encode('utf-8'), digest_size=16).digest()
+    parsed = _PARSED_HTML_CACHE.get(key)
+    if parsed is not None:
+        _PARSED_HTML_CACHE.move_to_end(key)
+        return parsed
+    
+    parsed = html_class(string=full_html)
+    
+    # Each worker renders one export at a time, so no lock is needed
+    _PARSED_HTML_CACHE[key] = parsed
+    if len(_PARSED_HTML_CACHE) > _PARSED_HTML_CACHE_SIZE:
+        _PARSED_HTML_CACHE.popitem(last=False)
+    
+    return parsed
+
+
+def render_pdf(full_html):
+    """
+    Render an HTML document to PDF bytes (runs in a PDF worker process).
+    
+    Args:
+        full_html: Complete HTML document
+        
+    Returns:
+        bytes: PDF content, or None if WeasyPrint is not available
+    """
+    weasyprint = _load_weasyprint()
+    if weasyprint is None:
+        return None
+    
+    html_class, stylesheet, font_config = weasyprint
+    return _parse_pdf_html(html_class, full_html).write_pdf(stylesheets=[stylesheet], font_config=font_config)
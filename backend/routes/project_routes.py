@@ -9,9 +9,11 @@ import os
 import tempfile
 import json
 import io
+import traceback
 from threading import Thread
 from datetime import datetime
 
+from config.settings import Config
 from utils.decorators import require_auth, handle_errors
 from utils.validators import validate_project_name, validate_github_url, validate_file_extension
 from models.project import Project
@@ -25,7 +27,7 @@ from services.code_analyzer import CodeAnalyzer
 from services.documentation_generator import DocumentationGenerator
 from services.security_analyzer import SecurityAnalyzer
 from services.code_quality_analyzer import CodeQualityAnalyzer
-from services.rag_service import RAGService
+from services.rag_service import RAGService, invalidate_answers
 from services.export_service import ExportService
 # ColorAnalyzer removed for performance
 
@@ -74,7 +76,7 @@ def process_project_async(project_id, files_dict):
         Project.update_status(project_id, 'processing', 40, 'Generating documentation...')
         doc_gen = DocumentationGenerator()
         project = Project.find_by_id(project_id)
-        doc_result = doc_gen.generate(project['name'], files_dict)
+        doc_result = doc_gen.generate(project['name'], files_dict, analysis=analysis)
         print(f"[2/5] ✅ Documentation generated ({len(doc_result['content'])} chars)")
         
         # Store documentation in database
@@ -170,7 +172,6 @@ def process_project_async(project_id, files_dict):
             print(f"[3/5] ✅ Security analysis complete: {len(sec_findings)} findings")
         except Exception as sec_error:
             print(f"[3/5] ⚠️ Security analysis failed: {sec_error}")
-            import traceback
             traceback.print_exc()
         
         # Step 4: Code Quality Analysis (in background - analyzes top 50 files)
@@ -213,7 +214,6 @@ def process_project_async(project_id, files_dict):
             print(f"[4/5] ✅ Code quality analysis complete: {len(improvements)} improvements")
         except Exception as qual_error:
             print(f"[4/5] ⚠️ Code quality analysis failed: {qual_error}")
-            import traceback
             traceback.print_exc()
         
         # Step 5: Create embeddings for RAG (in background)
@@ -225,7 +225,6 @@ def process_project_async(project_id, files_dict):
             Project.update_status(project_id, 'completed', 100, 'All analysis complete - Chat ready!')
         except Exception as embed_error:
             print(f"[5/5] ⚠️ Embedding creation failed: {embed_error}")
-            import traceback
             traceback.print_exc()
             # Don't fail the whole project if embeddings fail - docs are still viewable
             Project.update_status(project_id, 'completed', 100, 'Documentation ready (chat unavailable)')
@@ -235,7 +234,6 @@ def process_project_async(project_id, files_dict):
         print(f"{'='*60}\n")
     
     except Exception as e:
-        import traceback
         print(f"\n{'='*60}")
         print(f"❌ CRITICAL ERROR: {project_id}")
         print(f"Error: {e}")
@@ -525,25 +523,27 @@ def connect_github(user_id):
         # Read files and upload to S3
         s3_service = S3Service()
         files_dict = {}
-        valid_file_count = 0
         
-        for file_path in files_list:
-            if validate_file_extension(file_path):
-                valid_file_count += 1
-                content = github_service.read_file(repo_path, file_path)
-                if content:
-                    # Make file path S3 compatible (replace backslashes)
-                    s3_compatible_path = file_path.replace('\\', '/')
-                    files_dict[s3_compatible_path] = content
-                    
-                    # Upload to S3 with proper folder structure
-                    s3_key = f"{s3_code_path}{s3_compatible_path}"
-                    with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
-                        temp_file.write(content)
-                        temp_file_path = temp_file.name
-                    
-                    s3_service.upload_file(temp_file_path, s3_key)
-                    os.unlink(temp_file_path)
+        # Read all valid files concurrently
+        valid_paths = [file_path for file_path in files_list if validate_file_extension(file_path)]
+        valid_file_count = len(valid_paths)
+        file_contents = github_service.read_files_batch(repo_path, valid_paths)
+        
+        for file_path in valid_paths:
+            content = file_contents[file_path]
+            if content:
+                # Make file path S3 compatible (replace backslashes)
+                s3_compatible_path = file_path.replace('\\', '/')
+                files_dict[s3_compatible_path] = content
+                
+                # Upload to S3 with proper folder structure
+                s3_key = f"{s3_code_path}{s3_compatible_path}"
+                with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8') as temp_file:
+                    temp_file.write(content)
+                    temp_file_path = temp_file.name
+                
+                s3_service.upload_file(temp_file_path, s3_key)
+                os.unlink(temp_file_path)
         
         print(f"[DEBUG] Valid files with allowed extensions: {valid_file_count}")
         print(f"[DEBUG] Successfully read and stored: {len(files_dict)} files")
@@ -714,6 +714,9 @@ def update_documentation(user_id, project_id):
     # Update documentation in database
     Documentation.update(project_id, content)
     
+    # Chat answers cached from the previous documentation are stale
+    invalidate_answers(project_id)
+    
     # Also upload to S3
     try:
         project = Project.find_by_id(project_id)
@@ -834,7 +837,6 @@ def export_documentation(user_id, project_id):
         
     except Exception as e:
         print(f"Export error: {e}")
-        import traceback
         traceback.print_exc()
         
         return jsonify({
@@ -965,8 +967,6 @@ def get_quota_status(user_id):
     GET /api/projects/quota
     Returns: {success, data: {quota_info}}
     """
-    from config.settings import Config
-    
     # Get quota statistics (always active)
     quota_stats = UserQuota.get_quota_stats(user_id)
     
@@ -990,8 +990,6 @@ def get_message_quota_status(user_id):
     GET /api/projects/chat/quota
     Returns: {success, data: {quota_info}}
     """
-    from config.settings import Config
-    
     # Get message quota statistics (always active)
     quota_stats = UserQuota.get_message_quota_stats(user_id)
     
@@ -2,19 +2,57 @@
 Claude API service for AI-powered code analysis and documentation generation.
 """
 
+from itertools import islice
+import httpx
 from anthropic import Anthropic
 from config.settings import Config
 
+# 30 minute read timeout for long generations, but fail fast when the API is unreachable
+_HTTP_TIMEOUT = httpx.Timeout(1800.0, connect=5.0)
+
+# Shared keep-alive pool so every ClaudeService instance reuses TCP/TLS connections.
+# Pool limits belong on the transport: httpx ignores Client(limits=...) when a transport is given
+_HTTP_CLIENT = httpx.Client(
+    timeout=_HTTP_TIMEOUT,
+    transport=httpx.HTTPTransport(
+        retries=2,  # Retry transient connect errors
+        limits=httpx.Limits(
+            max_connections=64,
+            max_keepalive_connections=32,
+            keepalive_expiry=60
+        )
+    )
+)
+
+
+# Security analysis instructions; kept byte-identical ahead of the per-file content
+# so every request shares the same prompt prefix
+_SECURITY_INSTRUCTIONS = """Analyze the code below for security vulnerabilities.
+
+Identify security issues and return them as a JSON array with this structure:
+[
+  {
+    "severity": "critical|high|medium|low|info",
+    "title": "Brief title",
+    "description": "Detailed description",
+    "line_number": 42 (if applicable),
+    "recommendation": "How to fix",
+    "category": "injection|xss|auth|crypto|etc"
+  }
+]
+
+Only return the JSON array, no additional text."""
+
 
 class ClaudeService:
     """Service for interacting with Claude AI API."""
     
     def __init__(self):
-        """Initialize Claude client with API key."""
-        # Initialize Anthropic client with only API key
+        """Initialize Claude client with API key and a pooled HTTP client."""
         self.client = Anthropic(
             api_key=Config.CLAUDE_API_KEY,
-            timeout=1800.0,  # 30 minute timeout
+            http_client=_HTTP_CLIENT,
+            timeout=_HTTP_TIMEOUT,  # Per-request timeout; a bare float would drop the connect timeout
             max_retries=3
         )
         self.model = Config.CLAUDE_MODEL
@@ -100,10 +138,11 @@ Please provide a detailed analysis."""
         Returns:
             str: Generated markdown documentation
         """
-        # Prepare code context
-        code_context = ""
-        for filename, content in list(code_files.items())[:10]:  # Limit to first 10 files
-            code_context += f"\n\n### File: {filename}\n```\n{content[:2000]}\n```"  # Limit content length
+        # Prepare code context (first 10 files, content length limited)
+        code_context = ''.join(
+            f"\n\n### File: {filename}\n```\n{content[:2000]}\n```"
+            for filename, content in islice(code_files.items(), 10)
+        )
         
         prompt = f"""Generate concise technical documentation for '{project_name}'.
 
@@ -219,26 +258,15 @@ Third-party libraries and services.
         Returns:
             str: JSON-formatted security findings
         """
-        prompt = f"""Analyze this code for security vulnerabilities from file '{filename}'.
+        # Static instructions first, file-specific content last
+        prompt = f"""{_SECURITY_INSTRUCTIONS}
+
+File: '{filename}'
 
 Code:
 ```
 {code}
-```
-
-Identify security issues and return them as a JSON array with this structure:
-[
-  {{
-    "severity": "critical|high|medium|low|info",
-    "title": "Brief title",
-    "description": "Detailed description",
-    "line_number": 42 (if applicable),
-    "recommendation": "How to fix",
-    "category": "injection|xss|auth|crypto|etc"
-  }}
-]
-
-Only return the JSON array, no additional text."""
+```"""
         
         system_message = "You are a security expert specializing in code vulnerability analysis. Focus on practical, exploitable issues."
         
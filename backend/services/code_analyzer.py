@@ -3,8 +3,28 @@ Code analyzer service for analyzing codebase structure and content.
 """
 
 import os
+from collections import defaultdict
+from itertools import islice
+from config.settings import Config
 from utils.helpers import detect_language
-from utils.validators import validate_file_extension
+from utils.validators import file_extension
+
+# Extension whitelist frozen once at import for O(1) membership checks
+_ALLOWED_EXTENSIONS = frozenset(Config.ALLOWED_EXTENSIONS)
+
+# Well-known file names mapped to their identify_important_files category
+_IMPORTANT_FILE_NAMES = {
+    **dict.fromkeys(
+        ('package.json', 'requirements.txt', 'setup.py', 'cargo.toml',
+         'pom.xml', 'build.gradle', 'composer.json', 'go.mod'),
+        'config'
+    ),
+    **dict.fromkeys(
+        ('main.py', 'index.js', 'app.py', 'main.go', 'main.rs',
+         'index.ts', 'server.js', 'app.js'),
+        'entry_points'
+    ),
+}
 
 
 class CodeAnalyzer:
@@ -16,50 +36,83 @@ class CodeAnalyzer:
         Analyze files to extract metadata and statistics.
         
         Args:
-            file_paths_and_content: Dict of {file_path: content}
+            file_paths_and_content: Dict of {file_path: content} (str or bytes)
             
         Returns:
             dict: Analysis results with statistics
         """
+        stats, _ = CodeAnalyzer._scan(file_paths_and_content, with_summaries=False)
+        file_count = len(file_paths_and_content)
+        
         analysis = {
-            'file_count': len(file_paths_and_content),
-            'total_lines': 0,
+            'file_count': file_count,
+            'total_lines': stats['total_lines'],
             'languages': {},
-            'file_types': {},
-            'avg_file_size': 0,
-            'largest_file': None,
+            'file_types': stats['file_types'],
+            'avg_file_size': stats['total_size'] // file_count if file_count > 0 else 0,
+            'largest_file': stats['largest_file'],
             'primary_language': None,
         }
         
+        # Detect primary language
+        file_paths = list(file_paths_and_content.keys())
+        analysis['primary_language'] = detect_language(file_paths)
+        
+        return analysis
+    
+    @staticmethod
+    def _scan(files_dict, max_files=None, with_summaries=True):
+        """
+        Compute per-file metrics and aggregate statistics in a single pass.
+        
+        Args:
+            files_dict: Dict of {file_path: content} (str or bytes)
+            max_files: Optional cap on the number of files scanned
+            with_summaries: Whether to build per-file summary dicts
+            
+        Returns:
+            tuple: (stats dict, list of file summary dicts)
+        """
+        _splitext = os.path.splitext
+        file_types = defaultdict(int)
+        summaries = []
+        append = summaries.append
+        total_lines = 0
         total_size = 0
         largest_size = 0
+        largest_file = None
         
-        for file_path, content in file_paths_and_content.items():
-            # Count lines
-            lines = content.count('\n') + 1
-            analysis['total_lines'] += lines
-            
-            # Track file size
+        for file_path, content in islice(files_dict.items(), max_files):
+            # bytes.count uses memchr, so undecoded content is cheaper to scan
+            newline = b'\n' if isinstance(content, bytes) else '\n'
+            lines = content.count(newline) + 1
             size = len(content)
+            ext = _splitext(file_path)[1].lower()
+            
+            total_lines += lines
             total_size += size
+            file_types[ext] += 1
             
             if size > largest_size:
                 largest_size = size
-                analysis['largest_file'] = file_path
+                largest_file = file_path
             
-            # Track file extension
-            ext = os.path.splitext(file_path)[1].lower()
-            analysis['file_types'][ext] = analysis['file_types'].get(ext, 0) + 1
-        
-        # Calculate average file size
-        if analysis['file_count'] > 0:
-            analysis['avg_file_size'] = total_size // analysis['file_count']
+            if with_summaries:
+                append({
+                    'path': file_path,
+                    'lines': lines,
+                    'size': size,
+                    'extension': ext,
+                })
         
-        # Detect primary language
-        file_paths = list(file_paths_and_content.keys())
-        analysis['primary_language'] = detect_language(file_paths)
+        stats = {
+            'total_lines': total_lines,
+            'total_size': total_size,
+            'largest_file': largest_file,
+            'file_types': dict(file_types),
+        }
         
-        return analysis
+        return stats, summaries
     
     @staticmethod
     def filter_code_files(files_dict):
@@ -75,11 +128,12 @@ class CodeAnalyzer:
         filtered = {}
         
         for file_path, content in files_dict.items():
-            # Check if extension is allowed
-            if validate_file_extension(file_path):
-                # Skip empty files
-                if content and len(content.strip()) > 0:
-                    filtered[file_path] = content
+            # Check extension first (cheap, same extraction as validate_file_extension), then skip
+            # empty/whitespace-only files; isspace() exits at the first non-whitespace char
+            # instead of copying via strip()
+            if (file_path and file_extension(file_path) in _ALLOWED_EXTENSIONS
+                    and content and not content.isspace()):
+                filtered[file_path] = content
         
         return filtered
     
@@ -95,20 +149,7 @@ class CodeAnalyzer:
         Returns:
             list: List of file summary dicts
         """
-        summaries = []
-        
-        for file_path, content in list(files_dict.items())[:max_files]:
-            lines = content.count('\n') + 1
-            size = len(content)
-            ext = os.path.splitext(file_path)[1].lower()
-            
-            summaries.append({
-                'path': file_path,
-                'lines': lines,
-                'size': size,
-                'extension': ext,
-            })
-        
+        _, summaries = CodeAnalyzer._scan(files_dict, max_files)
         return summaries
     
     @staticmethod
@@ -129,27 +170,20 @@ class CodeAnalyzer:
             'tests': [],
         }
         
-        for file_path in files_dict.keys():
-            filename = os.path.basename(file_path).lower()
+        _basename = os.path.basename
+        
+        for file_path in files_dict:
+            filename = _basename(file_path).lower()
+            category = _IMPORTANT_FILE_NAMES.get(filename)
             
-            # README files
+            # Each file lands in at most one category
             if 'readme' in filename:
                 important['readme'].append(file_path)
-            
-            # Config files
-            config_names = ['package.json', 'requirements.txt', 'setup.py', 'cargo.toml',
-                          'pom.xml', 'build.gradle', 'composer.json', 'go.mod']
-            if filename in config_names or filename.endswith('.config.js'):
+            elif category:
+                important[category].append(file_path)
+            elif filename.endswith('.config.js'):
                 important['config'].append(file_path)
-            
-            # Entry points
-            entry_names = ['main.py', 'index.js', 'app.py', 'main.go', 'main.rs',
-                         'index.ts', 'server.js', 'app.js']
-            if filename in entry_names:
-                important['entry_points'].append(file_path)
-            
-            # Test files
-            if 'test' in filename or filename.startswith('test_') or filename.endswith('_test.py'):
+            elif 'test' in filename:  # Also covers test_*.py and *_test.py
                 important['tests'].append(file_path)
         
         return important
@@ -3,15 +3,73 @@ Code quality analyzer service using Claude AI for improvement suggestions.
 """
 
 from services.claude_service import ClaudeService
+from config.settings import Config
+from utils.disk_cache import DiskCache
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+from itertools import islice
 import json
+import re
+
+# orjson is optional - parses Claude's JSON arrays faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum Claude batch calls in flight at once
+_MAX_CONCURRENT_BATCHES = 8
+
+# Maximum characters of each file included in a batch prompt
+_MAX_FILE_CHARS_FOR_LLM = 5000
+
+# JSON array inside a (optionally ```json) fence, searched first so brackets in prose can't win
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\[.*\])\s*```", re.DOTALL | re.IGNORECASE)
+
+# Bare JSON array, the fallback when the response has no fenced block
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
+# Fields every improvement from Claude must include
+_REQUIRED_FIELDS = frozenset(('category', 'title', 'description', 'suggestion', 'impact_level'))
+
+# Direct lookup for the category labels Claude returns most often
+_CATEGORY_MAP = {
+    'performance': 'performance',
+    'perf': 'performance',
+    'readability': 'readability',
+    'readable': 'readability',
+    'clarity': 'readability',
+    'maintainability': 'maintainability',
+    'maintain': 'maintainability',
+    'security': 'security',
+    'secure': 'security',
+    'best-practice': 'best-practice',
+    'best-practices': 'best-practice',
+    'error-handling': 'error-handling',
+}
+
+
+def _decode_json_array(text):
+    """Decode the JSON value at the start of text, preferring orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Trailing text after the array - fall back to the stdlib's raw_decode
+            pass
+    
+    value, _ = _JSON_DECODER.raw_decode(text)
+    return value
 
 
 class CodeQualityAnalyzer:
     """Service for analyzing code quality and suggesting improvements."""
     
     def __init__(self):
-        """Initialize with Claude service."""
+        """Initialize with Claude service and persistent result cache."""
         self.claude_service = ClaudeService()
+        self._cache = DiskCache(Config.ANALYSIS_CACHE_DIR, 'quality')
     
     def analyze_file(self, filename, content):
         """
@@ -25,17 +83,21 @@ class CodeQualityAnalyzer:
             list: List of improvement dicts
         """
         try:
-            # Get analysis from Claude
-            response = self.claude_service.suggest_code_improvements(content, filename)
+            # Reuse earlier results for identical content analyzed by the same model
+            cache_key = self._cache_key(content, 'file')
+            improvements = self._cache.get(cache_key)
             
-            # Parse JSON response
-            improvements = self._parse_improvements(response)
+            if improvements is None:
+                # Get analysis from Claude
+                response = self.claude_service.suggest_code_improvements(content, filename)
+                
+                # Parse JSON response
+                improvements = self._parse_improvements(response)
+                if improvements:
+                    self._cache.set(cache_key, improvements)
             
             # Add filename to each improvement
-            for improvement in improvements:
-                improvement['file_path'] = filename
-            
-            return improvements
+            return [{**improvement, 'file_path': filename} for improvement in improvements]
         
         except Exception as e:
             print(f"Error analyzing {filename}: {e}")
@@ -52,36 +114,162 @@ class CodeQualityAnalyzer:
         Returns:
             list: Combined list of all improvements
         """
-        all_improvements = []
+        return list(self.analyze_project_stream(code_files, max_files))
+    
+    def analyze_project_stream(self, code_files, max_files=50):
+        """
+        Analyze project files for quality improvements, yielding results as batches finish.
+        
+        Args:
+            code_files: Dict of {file_path: content}
+            max_files: Maximum files to analyze (default: 50 for performance)
+            
+        Yields:
+            dict: Improvement dicts cached first, then in batch order
+        """
+        found = 0
         
         # Limit files for performance
-        files_to_analyze = list(code_files.items())[:max_files]
+        files_to_analyze = list(islice(code_files.items(), max_files)) if max_files else list(code_files.items())
         
         print(f"[Quality] Analyzing {len(files_to_analyze)} files (batched for performance)...")
         
+        # Reuse improvements for files whose content was analyzed before
+        pending_files = []
+        for file_path, content in files_to_analyze:
+            cached = self._cache.get(self._cache_key(content, 'batch'))
+            if cached is None:
+                pending_files.append((file_path, content))
+                continue
+            
+            for improvement in cached:
+                found += 1
+                yield {**improvement, 'file_path': file_path}
+        
+        if len(pending_files) < len(files_to_analyze):
+            print(f"[Quality] Reusing cached improvements for {len(files_to_analyze) - len(pending_files)} unchanged files")
+        
+        # Send only one copy of byte-identical files to Claude
+        pending_contents = dict(pending_files)
+        unique_files, duplicates = self._group_duplicates(pending_files)
+        if duplicates:
+            print(f"[Quality] Skipping {len(pending_files) - len(unique_files)} duplicate files")
+        
         # Batch files together - analyze 10 files at a time in one Claude call
         batch_size = 10
-        for batch_idx in range(0, len(files_to_analyze), batch_size):
-            batch_files = files_to_analyze[batch_idx:batch_idx + batch_size]
+        total_batches = (len(unique_files) + batch_size - 1) // batch_size
+        batches = []
+        for batch_idx in range(0, len(unique_files), batch_size):
+            batch_files = unique_files[batch_idx:batch_idx + batch_size]
             
             # Combine files into one context
-            combined_context = ""
+            parts = []
+            append = parts.append
             for file_path, content in batch_files:
-                # Truncate large files
-                truncated_content = content[:5000] if len(content) > 5000 else content
-                combined_context += f"\n\n### File: {file_path}\n```\n{truncated_content}\n```"
+                # Truncate large files (slicing a shorter string returns it without copying)
+                append(f"\n\n### File: {file_path}\n```\n{content[:_MAX_FILE_CHARS_FOR_LLM]}\n```")
+            combined_context = ''.join(parts)
             
-            print(f"[Quality] Batch {batch_idx//batch_size + 1}/{(len(files_to_analyze) + batch_size - 1)//batch_size}: Analyzing {len(batch_files)} files...")
+            print(f"[Quality] Batch {batch_idx//batch_size + 1}/{total_batches}: Analyzing {len(batch_files)} files...")
+            batches.append((combined_context, batch_files))
+        
+        # Claude calls are network-bound, so run the batches concurrently
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(_MAX_CONCURRENT_BATCHES, len(batches))) as executor:
+                futures = [
+                    executor.submit(self._analyze_batch, combined_context, [f[0] for f in batch_files])
+                    for combined_context, batch_files in batches
+                ]
+                # Collect in submission order so improvements keep the file order
+                for (_, batch_files), future in zip(batches, futures):
+                    try:
+                        improvements = future.result()
+                    except Exception as e:
+                        print(f"[Quality] Batch analysis error: {e}")
+                        continue
+                    
+                    self._cache_batch_improvements(batch_files, improvements, duplicates, pending_contents)
+                    
+                    for improvement in improvements:
+                        found += 1
+                        yield improvement
+                        
+                        # Copy the improvement onto duplicates of the file it was reported for
+                        for duplicate_path in duplicates.get(improvement.get('file_path'), ()):
+                            found += 1
+                            yield {**improvement, 'file_path': duplicate_path}
+        
+        print(f"[Quality] ✅ Found {found} improvement suggestions across {len(files_to_analyze)} files")
+    
+    def _group_duplicates(self, files):
+        """
+        Collapse files with identical content onto a single representative.
+        
+        Args:
+            files: List of (file_path, content) tuples
             
-            # Analyze batch with Claude
-            try:
-                improvements = self._analyze_batch(combined_context, [f[0] for f in batch_files])
-                all_improvements.extend(improvements)
-            except Exception as e:
-                print(f"[Quality] Batch analysis error: {e}")
+        Returns:
+            tuple: (list of unique (file_path, content), dict of {representative_path: [duplicate_paths]})
+        """
+        representatives = {}
+        unique_files = []
+        duplicates = {}
+        
+        for file_path, content in files:
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            digest = blake2b(data, digest_size=16).digest()
+            
+            representative = representatives.get(digest)
+            if representative is None:
+                representatives[digest] = file_path
+                unique_files.append((file_path, content))
+            else:
+                duplicates.setdefault(representative, []).append(file_path)
+        
+        return unique_files, duplicates
+    
+    def _cache_key(self, content, prompt):
+        """
+        Cache key for improvements on identical content analyzed by the same model.
+        
+        Args:
+            content: File content
+            prompt: 'file' for the single-file prompt, 'batch' for the truncated batch prompt
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        return f"{self.claude_service.model}:{prompt}:{blake2b(data).hexdigest()}"
+    
+    def _cache_batch_improvements(self, batch_files, improvements, duplicates, contents):
+        """
+        Store a batch's improvements per file, keyed by file content; duplicates of a
+        file are cached under their own content with the same improvements.
+        
+        An empty result may mean the Claude call or parse failed, and improvements for
+        paths outside the batch cannot be attributed, so neither case is cached.
+        
+        Args:
+            batch_files: List of (file_path, content) pairs sent in the batch
+            improvements: Improvements returned for the batch
+            duplicates: Dict of {representative_path: [duplicate_paths]}
+            contents: Dict of {file_path: content} covering the duplicate paths
+        """
+        if not improvements:
+            return
         
-        print(f"[Quality] ✅ Found {len(all_improvements)} improvement suggestions across {len(files_to_analyze)} files")
-        return all_improvements
+        improvements_by_path = {file_path: [] for file_path, _ in batch_files}
+        for improvement in improvements:
+            file_improvements = improvements_by_path.get(improvement.get('file_path'))
+            if file_improvements is None:
+                return
+            file_improvements.append({key: value for key, value in improvement.items() if key != 'file_path'})
+        
+        for file_path, content in batch_files:
+            cache_key = self._cache_key(content, 'batch')
+            self._cache.set(cache_key, improvements_by_path[file_path])
+            for duplicate_path in duplicates.get(file_path, ()):
+                duplicate_key = self._cache_key(contents[duplicate_path], 'batch')
+                if duplicate_key != cache_key:
+                    self._cache.set(duplicate_key, improvements_by_path[file_path])
     
     def _analyze_batch(self, combined_context, file_paths):
         """Analyze a batch of files together."""
@@ -124,41 +312,16 @@ Return ONLY the JSON array, no other text."""
             list: List of improvement dicts
         """
         try:
-            # Try to extract JSON from response
-            response = claude_response.strip()
-            
-            # Remove markdown code blocks
-            if '```json' in response.lower():
-                # Find the json code block
-                start_marker = response.lower().find('```json')
-                start = response.find('\n', start_marker) + 1
-                end = response.find('```', start)
-                if end == -1:
-                    end = len(response)
-                response = response[start:end].strip()
-            elif '```' in response:
-                # Find any code block
-                start = response.find('```') + 3
-                # Skip language identifier if present
-                newline_pos = response.find('\n', start)
-                if newline_pos != -1 and newline_pos - start < 20:
-                    start = newline_pos + 1
-                end = response.find('```', start)
-                if end == -1:
-                    end = len(response)
-                response = response[start:end].strip()
-            
-            # Try to find JSON array
-            if '[' in response:
-                start = response.find('[')
-                end = response.rfind(']') + 1
-                response = response[start:end]
-            
-            # Clean up any remaining non-JSON text
-            response = response.strip()
-            
-            # Parse JSON
-            improvements = json.loads(response)
+            # Locate the JSON array: a fenced block first, else a bare array
+            match = _JSON_FENCE_RE.search(claude_response)
+            if match:
+                response = match.group(1)
+            else:
+                match = _JSON_ARRAY_RE.search(claude_response)
+                response = match.group(0) if match else claude_response.strip()
+            
+            # Parse JSON, stopping at the end of the first complete value
+            improvements = _decode_json_array(response)
             
             if not isinstance(improvements, list):
                 print(f"Warning: Expected list, got {type(improvements)}")
@@ -194,33 +357,14 @@ Return ONLY the JSON array, no other text."""
         Returns:
             bool: True if valid
         """
-        required = ['category', 'title', 'description', 'suggestion', 'impact_level']
-        
-        for field in required:
-            if field not in improvement:
-                return False
+        if not isinstance(improvement, dict) or not _REQUIRED_FIELDS <= improvement.keys():
+            return False
         
         # Normalize category to lowercase with hyphens
         # This ensures consistency with frontend filter values
         # "Performance" -> "performance", "Best Practices" -> "best-practice"
         if 'category' in improvement:
-            category = improvement['category'].lower().strip()
-            # Replace spaces with hyphens
-            category = category.replace(' ', '-')
-            # Normalize common variations
-            if 'best' in category and 'practice' in category:
-                category = 'best-practice'
-            elif 'performance' in category or 'perf' in category:
-                category = 'performance'
-            elif 'readability' in category or 'readable' in category or 'clarity' in category:
-                category = 'readability'
-            elif 'maintainability' in category or 'maintain' in category:
-                category = 'maintainability'
-            elif 'security' in category or 'secure' in category:
-                category = 'security'
-            elif 'error' in category and 'handling' in category:
-                category = 'error-handling'
-            improvement['category'] = category
+            improvement['category'] = self._normalize_category(improvement['category'])
         
         # Normalize impact_level to lowercase
         if 'impact_level' in improvement:
@@ -239,4 +383,36 @@ Return ONLY the JSON array, no other text."""
                 improvement['estimated_effort'] = 'medium'
         
         return True
+    
+    def _normalize_category(self, category):
+        """
+        Map a free-form category label onto a frontend filter value.
+        
+        Args:
+            category: Category string from Claude
+            
+        Returns:
+            str: Normalized category
+        """
+        category = category.lower().strip().replace(' ', '-')
+        
+        normalized = _CATEGORY_MAP.get(category)
+        if normalized:
+            return normalized
+        
+        # Fall back to substring matching for less common variations
+        if 'best' in category and 'practice' in category:
+            return 'best-practice'
+        elif 'performance' in category or 'perf' in category:
+            return 'performance'
+        elif 'readability' in category or 'readable' in category or 'clarity' in category:
+            return 'readability'
+        elif 'maintainability' in category or 'maintain' in category:
+            return 'maintainability'
+        elif 'security' in category or 'secure' in category:
+            return 'security'
+        elif 'error' in category and 'handling' in category:
+            return 'error-handling'
+        
+        return category
 
@@ -11,10 +11,104 @@ Identifies colors from:
 Uses Claude AI to categorize and describe color usage.
 """
 
+import json
+import os
 import re
+import threading
 from collections import Counter
+from types import MappingProxyType
 from services.claude_service import ClaudeService
 
+# orjson is optional - parses Claude's JSON responses faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Color extraction patterns, compiled once at import
+_HEX_RE = re.compile(r'#([0-9A-Fa-f]{6}|[0-9A-Fa-f]{3})(?![0-9A-Fa-f])')  # #RRGGBB or #RGB
+_RGB_RE = re.compile(r'rgba?\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)')  # rgb()/rgba()
+# Tailwind color classes in one scan: bg-blue-500, text-red-600, border-gray-300,
+# and gradient stops from-purple-500, to-blue-500, via-pink-500
+_TAILWIND_RE = re.compile(r'(?:bg|text|border|from|to|via)-(\w+-\d+)')
+
+# Doubled, upper-cased form of each hex digit for expanding #RGB to #RRGGBB
+_DOUBLED_HEX = {c: (c + c).upper() for c in '0123456789abcdefABCDEF'}
+
+# JSON array in Claude's response: fenced code block first, bare array as a fallback
+_JSON_BLOCK_RE = re.compile(r'```(?:json)?\s*(\[.*?\])\s*```', re.DOTALL | re.IGNORECASE)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# File types scanned for colors
+_COLOR_FILE_EXTENSIONS = frozenset({
+    '.css', '.scss', '.sass', '.less',  # Stylesheets
+    '.tsx', '.jsx', '.ts', '.js',       # React/JS files with Tailwind
+    '.vue', '.svelte',                  # Other frameworks
+    '.html', '.htm',                    # HTML files
+})
+_COLOR_FILE_HINTS = ('tailwind.config', 'theme')  # Config files
+
+# Common Tailwind color mappings (name -> hex), shared read-only by all analyzers
+_TAILWIND_COLORS = MappingProxyType({
+    # Slate
+    'slate-50': '#F8FAFC', 'slate-100': '#F1F5F9', 'slate-200': '#E2E8F0',
+    'slate-300': '#CBD5E1', 'slate-400': '#94A3B8', 'slate-500': '#64748B',
+    'slate-600': '#475569', 'slate-700': '#334155', 'slate-800': '#1E293B',
+    'slate-900': '#0F172A', 'slate-950': '#020617',
+    # Gray
+    'gray-50': '#F9FAFB', 'gray-100': '#F3F4F6', 'gray-200': '#E5E7EB',
+    'gray-300': '#D1D5DB', 'gray-400': '#9CA3AF', 'gray-500': '#6B7280',
+    'gray-600': '#4B5563', 'gray-700': '#374151', 'gray-800': '#1F2937',
+    'gray-900': '#111827', 'gray-950': '#030712',
+    # Blue
+    'blue-50': '#EFF6FF', 'blue-100': '#DBEAFE', 'blue-200': '#BFDBFE',
+    'blue-300': '#93C5FD', 'blue-400': '#60A5FA', 'blue-500': '#3B82F6',
+    'blue-600': '#2563EB', 'blue-700': '#1D4ED8', 'blue-800': '#1E40AF',
+    'blue-900': '#1E3A8A', 'blue-950': '#172554',
+    # Red
+    'red-50': '#FEF2F2', 'red-100': '#FEE2E2', 'red-200': '#FECACA',
+    'red-300': '#FCA5A5', 'red-400': '#F87171', 'red-500': '#EF4444',
+    'red-600': '#DC2626', 'red-700': '#B91C1C', 'red-800': '#991B1B',
+    'red-900': '#7F1D1D', 'red-950': '#450A0A',
+    # Green
+    'green-50': '#F0FDF4', 'green-100': '#DCFCE7', 'green-200': '#BBF7D0',
+    'green-300': '#86EFAC', 'green-400': '#4ADE80', 'green-500': '#22C55E',
+    'green-600': '#16A34A', 'green-700': '#15803D', 'green-800': '#166534',
+    'green-900': '#14532D', 'green-950': '#052E16',
+    # Yellow
+    'yellow-50': '#FEFCE8', 'yellow-100': '#FEF9C3', 'yellow-200': '#FEF08A',
+    'yellow-300': '#FDE047', 'yellow-400': '#FACC15', 'yellow-500': '#EAB308',
+    'yellow-600': '#CA8A04', 'yellow-700': '#A16207', 'yellow-800': '#854D0E',
+    'yellow-900': '#713F12', 'yellow-950': '#422006',
+    # Purple
+    'purple-50': '#FAF5FF', 'purple-100': '#F3E8FF', 'purple-200': '#E9D5FF',
+    'purple-300': '#D8B4FE', 'purple-400': '#C084FC', 'purple-500': '#A855F7',
+    'purple-600': '#9333EA', 'purple-700': '#7E22CE', 'purple-800': '#6B21A8',
+    'purple-900': '#581C87', 'purple-950': '#3B0764',
+    # Orange
+    'orange-50': '#FFF7ED', 'orange-100': '#FFEDD5', 'orange-200': '#FED7AA',
+    'orange-300': '#FDBA74', 'orange-400': '#FB923C', 'orange-500': '#F97316',
+    'orange-600': '#EA580C', 'orange-700': '#C2410C', 'orange-800': '#9A3412',
+    'orange-900': '#7C2D12', 'orange-950': '#431407',
+    # White/Black
+    'white': '#FFFFFF', 'black': '#000000',
+})
+
+# Claude color descriptions keyed by (hex/frequency tuple, project name), oldest evicted first
+_DESCRIPTION_CACHE = {}
+_DESCRIPTION_CACHE_SIZE = 256
+_DESCRIPTION_CACHE_LOCK = threading.Lock()
+
+
+def _extract_json_array(response):
+    """Extract the JSON array text from a Claude response."""
+    match = _JSON_BLOCK_RE.search(response)
+    if match:
+        return match.group(1)
+    
+    match = _JSON_ARRAY_RE.search(response)
+    return match.group(0) if match else response.strip()
+
 
 class ColorAnalyzer:
     """Analyzes code files to extract and categorize color palette."""
@@ -22,52 +116,7 @@ class ColorAnalyzer:
     def __init__(self):
         """Initialize color analyzer with Claude service."""
         self.claude_service = ClaudeService()
-        
-        # Common Tailwind color mappings (name -> hex)
-        self.tailwind_colors = {
-            # Slate
-            'slate-50': '#f8fafc', 'slate-100': '#f1f5f9', 'slate-200': '#e2e8f0',
-            'slate-300': '#cbd5e1', 'slate-400': '#94a3b8', 'slate-500': '#64748b',
-            'slate-600': '#475569', 'slate-700': '#334155', 'slate-800': '#1e293b',
-            'slate-900': '#0f172a', 'slate-950': '#020617',
-            # Gray
-            'gray-50': '#f9fafb', 'gray-100': '#f3f4f6', 'gray-200': '#e5e7eb',
-            'gray-300': '#d1d5db', 'gray-400': '#9ca3af', 'gray-500': '#6b7280',
-            'gray-600': '#4b5563', 'gray-700': '#374151', 'gray-800': '#1f2937',
-            'gray-900': '#111827', 'gray-950': '#030712',
-            # Blue
-            'blue-50': '#eff6ff', 'blue-100': '#dbeafe', 'blue-200': '#bfdbfe',
-            'blue-300': '#93c5fd', 'blue-400': '#60a5fa', 'blue-500': '#3b82f6',
-            'blue-600': '#2563eb', 'blue-700': '#1d4ed8', 'blue-800': '#1e40af',
-            'blue-900': '#1e3a8a', 'blue-950': '#172554',
-            # Red
-            'red-50': '#fef2f2', 'red-100': '#fee2e2', 'red-200': '#fecaca',
-            'red-300': '#fca5a5', 'red-400': '#f87171', 'red-500': '#ef4444',
-            'red-600': '#dc2626', 'red-700': '#b91c1c', 'red-800': '#991b1b',
-            'red-900': '#7f1d1d', 'red-950': '#450a0a',
-            # Green
-            'green-50': '#f0fdf4', 'green-100': '#dcfce7', 'green-200': '#bbf7d0',
-            'green-300': '#86efac', 'green-400': '#4ade80', 'green-500': '#22c55e',
-            'green-600': '#16a34a', 'green-700': '#15803d', 'green-800': '#166534',
-            'green-900': '#14532d', 'green-950': '#052e16',
-            # Yellow
-            'yellow-50': '#fefce8', 'yellow-100': '#fef9c3', 'yellow-200': '#fef08a',
-            'yellow-300': '#fde047', 'yellow-400': '#facc15', 'yellow-500': '#eab308',
-            'yellow-600': '#ca8a04', 'yellow-700': '#a16207', 'yellow-800': '#854d0e',
-            'yellow-900': '#713f12', 'yellow-950': '#422006',
-            # Purple
-            'purple-50': '#faf5ff', 'purple-100': '#f3e8ff', 'purple-200': '#e9d5ff',
-            'purple-300': '#d8b4fe', 'purple-400': '#c084fc', 'purple-500': '#a855f7',
-            'purple-600': '#9333ea', 'purple-700': '#7e22ce', 'purple-800': '#6b21a8',
-            'purple-900': '#581c87', 'purple-950': '#3b0764',
-            # Orange
-            'orange-50': '#fff7ed', 'orange-100': '#ffedd5', 'orange-200': '#fed7aa',
-            'orange-300': '#fdba74', 'orange-400': '#fb923c', 'orange-500': '#f97316',
-            'orange-600': '#ea580c', 'orange-700': '#c2410c', 'orange-800': '#9a3412',
-            'orange-900': '#7c2d12', 'orange-950': '#431407',
-            # White/Black
-            'white': '#ffffff', 'black': '#000000',
-        }
+        self.tailwind_colors = _TAILWIND_COLORS
     
     def analyze_colors(self, code_files, project_name):
         """
@@ -88,21 +137,17 @@ class ColorAnalyzer:
             dict: Color palette with top 5 colors and metadata
         """
         try:
-            # Step 1: Extract all colors from code files
-            all_colors = []
+            # Step 1 & 2: Extract colors and count frequency as each file is scanned
+            color_counter = Counter()
             
             for filename, content in code_files.items():
                 # Only analyze relevant files
                 if self._is_color_relevant_file(filename):
-                    colors = self._extract_colors_from_content(content, filename)
-                    all_colors.extend(colors)
+                    color_counter.update(self._extract_colors_from_content(content, filename))
             
-            if not all_colors:
+            if not color_counter:
                 return self._get_default_palette()
             
-            # Step 2: Count color frequency
-            color_counter = Counter(all_colors)
-            
             # Step 3: Get top 5 colors
             top_colors = color_counter.most_common(5)
             
@@ -143,20 +188,13 @@ class ColorAnalyzer:
         Returns:
             bool: True if file should be analyzed
         """
-        color_file_extensions = [
-            '.css', '.scss', '.sass', '.less',  # Stylesheets
-            '.tsx', '.jsx', '.ts', '.js',       # React/JS files with Tailwind
-            '.vue', '.svelte',                  # Other frameworks
-            '.html', '.htm',                    # HTML files
-            'tailwind.config', 'theme',         # Config files
-        ]
-        
         filename_lower = filename.lower()
         
-        return any(
-            filename_lower.endswith(ext) or ext in filename_lower
-            for ext in color_file_extensions
-        )
+        # Exact extension lookup first, substring hints only as a fallback
+        if os.path.splitext(filename_lower)[1] in _COLOR_FILE_EXTENSIONS:
+            return True
+        
+        return any(hint in filename_lower for hint in _COLOR_FILE_HINTS)
     
     def _extract_colors_from_content(self, content, filename):
         """
@@ -178,34 +216,24 @@ class ColorAnalyzer:
         colors = []
         
         # Extract hex colors (#RRGGBB or #RGB)
-        hex_colors = re.findall(r'#([0-9A-Fa-f]{6}|[0-9A-Fa-f]{3})(?![0-9A-Fa-f])', content)
-        for hex_color in hex_colors:
+        append = colors.append
+        for hex_color in _HEX_RE.findall(content):
             # Convert 3-digit hex to 6-digit
             if len(hex_color) == 3:
-                hex_color = ''.join([c*2 for c in hex_color])
-            colors.append(f'#{hex_color.upper()}')
+                append('#' + _DOUBLED_HEX[hex_color[0]] + _DOUBLED_HEX[hex_color[1]] + _DOUBLED_HEX[hex_color[2]])
+            else:
+                append('#' + hex_color.upper())
         
         # Extract RGB/RGBA colors
-        rgb_colors = re.findall(r'rgba?\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)', content)
-        for r, g, b in rgb_colors:
-            hex_color = f'#{int(r):02X}{int(g):02X}{int(b):02X}'
-            colors.append(hex_color)
+        for r, g, b in _RGB_RE.findall(content):
+            append('#%02X%02X%02X' % (int(r), int(g), int(b)))
         
         # Extract Tailwind color classes
-        tailwind_patterns = [
-            r'bg-(\w+-\d+)',      # bg-blue-500
-            r'text-(\w+-\d+)',    # text-red-600
-            r'border-(\w+-\d+)',  # border-gray-300
-            r'from-(\w+-\d+)',    # from-purple-500 (gradients)
-            r'to-(\w+-\d+)',      # to-blue-500
-            r'via-(\w+-\d+)',     # via-pink-500
-        ]
-        
-        for pattern in tailwind_patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                if match in self.tailwind_colors:
-                    colors.append(self.tailwind_colors[match].upper())
+        get_tailwind_color = self.tailwind_colors.get
+        for match in _TAILWIND_RE.findall(content):
+            hex_color = get_tailwind_color(match)
+            if hex_color is not None:
+                append(hex_color)
         
         return colors
     
@@ -250,29 +278,18 @@ Return as JSON array with this exact structure:
 Respond with ONLY the JSON array, no other text."""
 
         try:
-            response = self.claude_service.generate_completion(prompt, max_tokens=1000)
-            
-            # Parse JSON response
-            import json
+            # Same palette for the same project yields the same prompt - reuse the answer
+            cache_key = (tuple((c['hex'], c['frequency']) for c in colors_data), project_name)
+            with _DESCRIPTION_CACHE_LOCK:
+                response = _DESCRIPTION_CACHE.get(cache_key)
+            cached = response is not None
             
-            # Extract JSON from response
-            response = response.strip()
-            if '```json' in response.lower():
-                start = response.lower().find('```json') + 7
-                end = response.find('```', start)
-                response = response[start:end].strip()
-            elif '```' in response:
-                start = response.find('```') + 3
-                end = response.find('```', start)
-                response = response[start:end].strip()
+            if not cached:
+                response = self.claude_service.generate_completion(prompt, max_tokens=1000)
             
-            # Find JSON array
-            if '[' in response and ']' in response:
-                start = response.find('[')
-                end = response.rfind(']') + 1
-                response = response[start:end]
-            
-            color_descriptions = json.loads(response)
+            # Extract and parse JSON array from response
+            json_text = _extract_json_array(response)
+            color_descriptions = orjson.loads(json_text) if orjson else json.loads(json_text)
             
             # Add frequency and calculate RGB
             for i, color_desc in enumerate(color_descriptions):
@@ -280,6 +297,13 @@ Respond with ONLY the JSON array, no other text."""
                     color_desc['frequency'] = colors_data[i]['frequency']
                     color_desc['rgb'] = self._hex_to_rgb(color_desc['hex'])
             
+            # Only cache responses that parsed fully, so a malformed answer is retried next time
+            if not cached:
+                with _DESCRIPTION_CACHE_LOCK:
+                    if len(_DESCRIPTION_CACHE) >= _DESCRIPTION_CACHE_SIZE:
+                        _DESCRIPTION_CACHE.pop(next(iter(_DESCRIPTION_CACHE)), None)
+                    _DESCRIPTION_CACHE[cache_key] = response
+            
             return color_descriptions
             
         except Exception as e:
@@ -328,11 +352,17 @@ Respond with ONLY the JSON array, no other text."""
         Returns:
             dict: {r, g, b} values
         """
-        hex_color = hex_color.lstrip('#')
+        # Short forms can't be split into channels; extra digits (alpha) are ignored
+        hex_digits = hex_color.lstrip('#')
+        if len(hex_digits) < 6:
+            raise ValueError(f"Expected #RRGGBB hex color, got {hex_color!r}")
+        
+        # Parse once, then split channels with bit shifts
+        value = int(hex_digits[:6], 16)
         return {
-            'r': int(hex_color[0:2], 16),
-            'g': int(hex_color[2:4], 16),
-            'b': int(hex_color[4:6], 16)
+            'r': (value >> 16) & 0xFF,
+            'g': (value >> 8) & 0xFF,
+            'b': value & 0xFF
         }
     
     def _get_color_name_from_rgb(self, rgb):
@@ -381,19 +411,16 @@ Respond with ONLY the JSON array, no other text."""
             return 'mixed'
         
         dark_count = 0
-        light_count = 0
         
         for color in colors:
             rgb = color.get('rgb', {})
             r, g, b = rgb.get('r', 128), rgb.get('g', 128), rgb.get('b', 128)
             
-            # Calculate luminance
-            luminance = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-            
-            if luminance < 0.5:
+            # Luminance (0.299r + 0.587g + 0.114b) / 255 < 0.5, scaled to integers
+            if 299 * r + 587 * g + 114 * b < 127500:
                 dark_count += 1
-            else:
-                light_count += 1
+        
+        light_count = len(colors) - dark_count
         
         if dark_count > light_count * 1.5:
             return 'dark'
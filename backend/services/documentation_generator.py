@@ -2,10 +2,36 @@
 Documentation generator service using Claude AI.
 """
 
+from itertools import islice
+import re
 from services.claude_service import ClaudeService
 from services.code_analyzer import CodeAnalyzer
 
 
+# Section headers (## Header) at the start of a line
+_SECTION_HEADER_RE = re.compile(r'^## (.*)$', re.MULTILINE)
+
+# Section type mappings
+_SECTION_TYPE_MAP = {
+    'purpose and objectives': 'purpose',
+    'setup and installation': 'setup',
+    'architecture documentation': 'architecture',
+    'code documentation': 'code',
+    'user guides': 'user_guide',
+    'development documentation': 'development',
+    'maintenance information': 'maintenance',
+    'additional notes': 'notes',
+    'reference materials': 'reference'
+}
+
+# Code sample selection: (important file category, characters per file, max files or None for all)
+_SAMPLE_LIMITS = (
+    ('readme', 2000, None),
+    ('config', 1000, 3),
+    ('entry_points', 2000, 3),
+)
+
+
 class DocumentationGenerator:
     """Service for generating comprehensive documentation."""
     
@@ -13,42 +39,36 @@ class DocumentationGenerator:
         """Initialize with Claude service."""
         self.claude_service = ClaudeService()
     
-    def generate(self, project_name, code_files):
+    def generate(self, project_name, code_files, analysis=None):
         """
         Generate comprehensive documentation for a project.
         
         Args:
             project_name: Name of the project
             code_files: Dict of {file_path: content}
+            analysis: Optional precomputed CodeAnalyzer.analyze_files result
             
         Returns:
             dict: {content: markdown string, sections: dict of sections}
         """
-        # Analyze codebase
-        analysis = CodeAnalyzer.analyze_files(code_files)
+        # Analyze codebase (reuse caller's analysis to avoid rescanning every file)
+        if analysis is None:
+            analysis = CodeAnalyzer.analyze_files(code_files)
         important_files = CodeAnalyzer.identify_important_files(code_files)
         
         # Prepare code samples (prioritize important files)
         code_samples = {}
         
-        # Add README if exists
-        for readme_path in important_files.get('readme', []):
-            if readme_path in code_files:
-                code_samples[readme_path] = code_files[readme_path][:2000]
-        
-        # Add config files
-        for config_path in important_files.get('config', [])[:3]:
-            if config_path in code_files:
-                code_samples[config_path] = code_files[config_path][:1000]
-        
-        # Add entry points
-        for entry_path in important_files.get('entry_points', [])[:3]:
-            if entry_path in code_files:
-                code_samples[entry_path] = code_files[entry_path][:2000]
+        # Add README, config files and entry points
+        for category, char_limit, max_files in _SAMPLE_LIMITS:
+            for file_path in important_files.get(category, [])[:max_files]:
+                content = code_files.get(file_path)
+                if content is not None and file_path not in code_samples:
+                    code_samples[file_path] = content[:char_limit]
         
         # Add a few more representative files
         remaining = 10 - len(code_samples)
-        for file_path, content in list(code_files.items())[:remaining]:
+        for file_path, content in islice(code_files.items(), max(0, remaining)):
             if file_path not in code_samples:
                 code_samples[file_path] = content[:1500]
         
@@ -91,56 +111,22 @@ class DocumentationGenerator:
             list: Array of section objects with type, title, content, order
         """
         sections = []
-        current_section_title = None
-        current_content = []
         section_order = 0
         
-        # Define section type mappings
-        section_type_map = {
-            'purpose and objectives': 'purpose',
-            'setup and installation': 'setup',
-            'architecture documentation': 'architecture',
-            'code documentation': 'code',
-            'user guides': 'user_guide',
-            'development documentation': 'development',
-            'maintenance information': 'maintenance',
-            'additional notes': 'notes',
-            'reference materials': 'reference'
-        }
+        # Section bodies run from the end of one header to the start of the next
+        headers = list(_SECTION_HEADER_RE.finditer(markdown_content))
         
-        lines = markdown_content.split('\n')
-        
-        for line in lines:
-            # Check for section headers (## Header)
-            if line.startswith('## '):
-                # Save previous section
-                if current_section_title and current_content:
-                    content_text = '\n'.join(current_content).strip()
-                    if content_text:  # Only add non-empty sections
-                        section_key = current_section_title.lower()
-                        section_type = section_type_map.get(section_key, 'other')
-                        
-                        sections.append({
-                            'type': section_type,
-                            'title': current_section_title,
-                            'content': content_text,
-                            'order': section_order
-                        })
-                        section_order += 1
-                
-                # Start new section
-                current_section_title = line[3:].strip()
-                current_content = []
-            else:
-                if current_section_title:  # Only collect content if we have a section
-                    current_content.append(line)
-        
-        # Save last section
-        if current_section_title and current_content:
-            content_text = '\n'.join(current_content).strip()
-            if content_text:
+        for i, header in enumerate(headers):
+            current_section_title = header.group(1).strip()
+            if not current_section_title:
+                continue
+            
+            body_end = headers[i + 1].start() if i + 1 < len(headers) else len(markdown_content)
+            content_text = markdown_content[header.end():body_end].strip()
+            
+            if content_text:  # Only add non-empty sections
                 section_key = current_section_title.lower()
-                section_type = section_type_map.get(section_key, 'other')
+                section_type = _SECTION_TYPE_MAP.get(section_key, 'other')
                 
                 sections.append({
                     'type': section_type,
@@ -148,6 +134,7 @@ class DocumentationGenerator:
                     'content': content_text,
                     'order': section_order
                 })
+                section_order += 1
         
         return sections
     
@@ -163,15 +150,21 @@ class DocumentationGenerator:
         Returns:
             str: Updated markdown content
         """
-        sections = self._parse_sections(current_content)
-        sections[section_name] = new_section_content
+        # Match the section's header line and its body up to the next section header
+        section_re = re.compile(
+            r'^(## ' + re.escape(section_name.strip()) + r'[ \t]*\r?\n)(.*?)(?=^## |\Z)',
+            re.MULTILINE | re.DOTALL | re.IGNORECASE
+        )
         
-        # Rebuild markdown
-        rebuilt = []
-        for section_key, content in sections.items():
-            # Format section name
-            header = section_key.replace('_', ' ').title()
-            rebuilt.append(f"## {header}\n\n{content}\n")
+        # Splice the new body in place of the old one
+        updated, count = section_re.subn(
+            lambda match: f"{match.group(1)}\n{new_section_content.strip()}\n\n",
+            current_content,
+            count=1
+        )
         
-        return '\n'.join(rebuilt)
-
+        # Add the section at the end if it doesn't exist yet
+        if not count:
+            updated = f"{current_content.rstrip()}\n\n## {section_name.strip()}\n\n{new_section_content.strip()}\n"
+        
+        return updated
@@ -2,8 +2,28 @@
 Embedding service using OpenAI for creating vector embeddings.
 """
 
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
 from openai import OpenAI
 from config.settings import Config
+from utils.disk_cache import DiskCache
+
+# tiktoken is optional - truncates by tokens instead of characters
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+# Embedding model input limit is 8192 tokens; keep a small safety margin
+_MAX_INPUT_TOKENS = 8100
+_MAX_INPUT_BYTES = 8000  # Fallback when tiktoken is not installed (every token is at least one byte)
+
+# Inputs per embeddings request (32 full-length inputs stay under the per-request token cap);
+# larger batches are split and sent concurrently
+_SUB_BATCH_SIZE = 32
+_MAX_CONCURRENT_REQUESTS = 8
 
 
 class EmbeddingService:
@@ -18,6 +38,56 @@ class EmbeddingService:
             max_retries=2
         )
         self.model = Config.OPENAI_EMBEDDING_MODEL
+        self._encoding = self._load_encoding()
+        self._cache = DiskCache(Config.ANALYSIS_CACHE_DIR, 'embeddings')
+    
+    def _load_encoding(self):
+        """Load the tokenizer for the embedding model, or None if unavailable."""
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except Exception as e:
+            print(f"Tokenizer unavailable for {self.model}, truncating by characters: {e}")
+            return None
+    
+    def _truncate(self, text):
+        """
+        Truncate text to fit the embedding model's input limit.
+        
+        Args:
+            text: Text to truncate
+            
+        Returns:
+            str: Text within the model's token limit
+        """
+        # Every token covers at least one UTF-8 byte (a CJK character or emoji can be several tokens),
+        # so texts within the limit in bytes never need encoding
+        encoded = text.encode('utf-8')
+        if self._encoding is None:
+            if len(encoded) <= _MAX_INPUT_BYTES:
+                return text
+            return encoded[:_MAX_INPUT_BYTES].decode('utf-8', 'ignore')
+        
+        if len(encoded) <= _MAX_INPUT_TOKENS:
+            return text
+        
+        tokens = self._encoding.encode(text)
+        if len(tokens) > _MAX_INPUT_TOKENS:
+            text = self._encoding.decode(tokens[:_MAX_INPUT_TOKENS])
+        return text
+    
+    def _cache_key(self, text):
+        """Cache key for an embedding of identical text by the same model (shared across projects)."""
+        return f"{self.model}:{blake2b(text.encode('utf-8'), digest_size=16).hexdigest()}"
+    
+    def _cache_get(self, key):
+        """Get a cached embedding as a list of floats, or None."""
+        return self._cache.get(key)
+    
+    def _cache_set(self, key, embedding):
+        """Cache an embedding rounded to float32 (the precision pgvector stores)."""
+        self._cache.set(key, array('f', embedding).tolist())
     
     def create_embedding(self, text):
         """
@@ -39,8 +109,13 @@ class EmbeddingService:
                 raise ValueError("Empty text provided")
             
             # Truncate if too long (OpenAI has token limits)
-            if len(text) > 8000:
-                text = text[:8000]
+            text = self._truncate(text)
+            
+            # Reuse the embedding of identical text
+            cache_key = self._cache_key(text)
+            embedding = self._cache_get(cache_key)
+            if embedding is not None:
+                return embedding
             
             # Create embedding
             response = self.client.embeddings.create(
@@ -50,6 +125,7 @@ class EmbeddingService:
             
             # Extract embedding vector
             embedding = response.data[0].embedding
+            self._cache_set(cache_key, embedding)
             return embedding
         
         except Exception as e:
@@ -72,27 +148,87 @@ class EmbeddingService:
             for text in texts:
                 text = text.strip()
                 if text:
-                    if len(text) > 8000:
-                        text = text[:8000]
-                    clean_texts.append(text)
+                    clean_texts.append(self._truncate(text))
             
             if not clean_texts:
                 return []
             
-            # Create embeddings in batch
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=clean_texts
-            )
+            # Reuse embeddings of unchanged content (keyed by model and content hash)
+            keys = [self._cache_key(text) for text in clean_texts]
+            embeddings = [self._cache_get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            
+            if missing:
+                missing_texts = [clean_texts[i] for i in missing]
+                new_embeddings = self._embed_uncached(missing_texts)
+                
+                for i, embedding in zip(missing, new_embeddings):
+                    embeddings[i] = embedding
+                    self._cache_set(keys[i], embedding)
             
-            # Extract embedding vectors
-            embeddings = [item.embedding for item in response.data]
             return embeddings
         
         except Exception as e:
             print(f"OpenAI batch embedding error: {e}")
             raise Exception(f"Failed to create embeddings: {str(e)}")
     
+    def _embed_uncached(self, texts):
+        """
+        Call the embeddings API for cleaned, non-empty texts.
+        
+        Args:
+            texts: List of cleaned text strings
+            
+        Returns:
+            list: List of embedding vectors, in input order
+        """
+        # Too many inputs for one request - send sub-batches concurrently
+        if len(texts) > _SUB_BATCH_SIZE:
+            return self.create_embeddings_parallel(texts)
+        
+        return self._embed_request(texts)
+    
+    def _embed_request(self, texts):
+        """Create embeddings for up to one request's worth of texts, in input order."""
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=texts
+        )
+        
+        # Extract embedding vectors
+        return [item.embedding for item in response.data]
+    
+    def create_embeddings_parallel(self, texts, sub_batch=_SUB_BATCH_SIZE, concurrency=_MAX_CONCURRENT_REQUESTS):
+        """
+        Create embeddings for many texts using concurrent sub-batch requests.
+        
+        Requests are network-bound, so they share the client's connection pool
+        from a bounded set of threads.
+        
+        Args:
+            texts: List of cleaned, non-empty text strings
+            sub_batch: Maximum inputs per API request
+            concurrency: Maximum requests in flight at once
+            
+        Returns:
+            list: List of embedding vectors, in input order
+        """
+        chunks = [texts[i:i + sub_batch] for i in range(0, len(texts), sub_batch)]
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+            results = list(executor.map(self._embed_request, chunks))
+        
+        return [embedding for sub in results for embedding in sub]
+    
+    @staticmethod
+    def code_file_text(filename, content):
+        """Format a code file as the text that is embedded and stored."""
+        return f"File: {filename}\n\n{content}"
+    
+    @staticmethod
+    def documentation_text(section_name, content):
+        """Format a documentation section as the text that is embedded and stored."""
+        return f"Documentation - {section_name}\n\n{content}"
+    
     def embed_code_file(self, filename, content):
         """
         Create embedding for a code file with metadata.
@@ -105,7 +241,7 @@ class EmbeddingService:
             dict: {text: formatted text, embedding: vector, metadata: info}
         """
         # Format text for embedding
-        formatted_text = f"File: {filename}\n\n{content}"
+        formatted_text = self.code_file_text(filename, content)
         
         # Create embedding
         embedding = self.create_embedding(formatted_text)
@@ -134,7 +270,7 @@ class EmbeddingService:
             dict: {text: formatted text, embedding: vector, metadata: info}
         """
         # Format text for embedding
-        formatted_text = f"Documentation - {section_name}\n\n{content}"
+        formatted_text = self.documentation_text(section_name, content)
         
         # Create embedding
         embedding = self.create_embedding(formatted_text)
@@ -150,4 +286,66 @@ class EmbeddingService:
             'embedding': embedding,
             'metadata': metadata
         }
-
+    
+    def embed_code_files_batch(self, files):
+        """
+        Create embeddings for multiple code files in a single API request.
+        
+        Args:
+            files: Dict of {filename: content}
+            
+        Returns:
+            list: List of {text: formatted text, embedding: vector, metadata: info}
+        """
+        # Format texts for embedding (same format as embed_code_file)
+        formatted_texts = [self.code_file_text(filename, content) for filename, content in files.items()]
+        if not formatted_texts:
+            return []
+        
+        # Create all embeddings in one request
+        embeddings = self.create_embeddings_batch(formatted_texts)
+        
+        return [
+            {
+                'text': formatted_text,
+                'embedding': embedding,
+                'metadata': {
+                    'filename': filename,
+                    'type': 'code_file'
+                }
+            }
+            for filename, formatted_text, embedding in zip(files, formatted_texts, embeddings)
+        ]
+    
+    def embed_documentation_batch(self, sections):
+        """
+        Create embeddings for multiple documentation sections in a single API request.
+        
+        Args:
+            sections: Dict of {section_name: content}, or list of (section_name, content)
+                      pairs when section names may repeat
+            
+        Returns:
+            list: List of {text: formatted text, embedding: vector, metadata: info}
+        """
+        items = list(sections.items()) if isinstance(sections, dict) else list(sections)
+        
+        # Format texts for embedding (same format as embed_documentation)
+        formatted_texts = [self.documentation_text(section_name, content) for section_name, content in items]
+        if not formatted_texts:
+            return []
+        
+        # Create all embeddings in one request
+        embeddings = self.create_embeddings_batch(formatted_texts)
+        
+        return [
+            {
+                'text': formatted_text,
+                'embedding': embedding,
+                'metadata': {
+                    'section': section_name,
+                    'type': 'documentation'
+                }
+            }
+            for (section_name, _), formatted_text, embedding in zip(items, formatted_texts, embeddings)
+        ]
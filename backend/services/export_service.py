@@ -7,25 +7,159 @@ Handles exporting documentation in multiple formats:
 - PDF (.pdf)
 """
 
+import html
+import importlib.util
 import io
+import multiprocessing
+import os
 import re
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from functools import lru_cache
+from hashlib import blake2b
 from docx import Document
-from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-import markdown2
+from docx.shared import Pt, RGBColor, Inches
+from pdf_worker import render_pdf
+
+# markdown2 is imported on first PDF export, and WeasyPrint only in the PDF workers,
+# so server workers that never export PDFs don't pay their import time and memory
+
+# PDF rendering is CPU-bound, so it runs in worker processes; extra exports queue for a free worker.
+# Workers are spawned once and kept; each imports only pdf_worker (plus the main script, which
+# app.py keeps cheap by creating the app lazily)
+_PDF_RENDER_WORKERS = max(1, min(4, os.cpu_count() or 1))
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _weasyprint_installed():
+    """Check whether WeasyPrint is installed without importing it (the parent never renders)."""
+    return importlib.util.find_spec('weasyprint') is not None
+
+
+def _get_pdf_pool():
+    """Get the shared PDF worker pool, starting it on first use."""
+    global _pdf_pool
+    
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Spawn rather than fork: forking a threaded server can copy held locks into the child
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pdf_pool
+
+
+def _reset_pdf_pool(pool):
+    """Drop a broken PDF worker pool (a worker crashed or was killed) so the next export starts a fresh one."""
+    global _pdf_pool
+    
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False)
+
+
+# Numbered list item prefix (1. item) and characters not allowed in filenames
+_NUMBERED_LIST_RE = re.compile(r'^\d+\.\s')
+_INVALID_FILENAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+# Bullet list item prefixes (- item, * item, • item)
+_BULLET_PREFIXES = frozenset({'- ', '* ', '• '})
+
+
+def _classify_markdown_line(line):
+    """
+    Classify one markdown line for DOCX export.
+    
+    Args:
+        line: Raw markdown line
+        
+    Returns:
+        tuple: (kind, text, heading level) where kind is one of
+               'blank', 'heading', 'bullet', 'numbered', 'paragraph'
+    """
+    line = line.rstrip()
+    
+    if not line:
+        return 'blank', None, None
+    
+    # Headings (## Heading), deeper than level 4 rendered as level 4
+    if line[0] == '#':
+        text = line.lstrip('#')
+        return 'heading', text.strip(), min(len(line) - len(text), 4)
+    
+    if line[:2] in _BULLET_PREFIXES:
+        return 'bullet', line[2:].strip(), None
+    
+    numbered = _NUMBERED_LIST_RE.match(line)
+    if numbered:
+        return 'numbered', line[numbered.end():], None
+    
+    return 'paragraph', line, None
+
+
+# Inline markdown formatting, in priority order: **bold**, `code`, *italic*
+# (an unclosed ** is literal text rather than the start of an italic span)
+_INLINE_FORMAT_RE = re.compile(r'\*\*(.*?)\*\*|`([^`]*)`|\*(?!\*)([^*]*)\*', re.DOTALL)
+
+# Date shown in export headers, e.g. "January 05, 2025"
+_EXPORT_DATE_FORMAT = '%B %d, %Y'
 
-# WeasyPrint is optional (requires GTK libraries on Windows)
-# If not available, PDF export will show an error message
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except (ImportError, OSError) as e:
-    print(f"⚠️ WeasyPrint not available: {e}")
-    print("📝 PDF export will not work. Markdown and DOCX exports are still available.")
-    WEASYPRINT_AVAILABLE = False
-    HTML = None
-    CSS = None
+
+@lru_cache(maxsize=1)
+def _format_export_date(day):
+    """Format an export date; exports on the same day reuse the formatted string."""
+    return day.strftime(_EXPORT_DATE_FORMAT)
+
+
+# Markdown extras used for PDF export
+_MARKDOWN_EXTRAS = ('fenced-code-blocks', 'tables', 'header-ids')
+
+# Converted HTML keyed by markdown content hash, least recently used evicted first
+_HTML_CACHE = OrderedDict()
+_HTML_CACHE_SIZE = 256
+_HTML_CACHE_LOCK = threading.Lock()
+
+# Markdown parsers are stateful, so each thread reuses its own instance
+_markdown_parsers = threading.local()
+
+
+def _get_markdown_parser():
+    """Get this thread's markdown parser, creating it on first use."""
+    parser = getattr(_markdown_parsers, 'parser', None)
+    if parser is None:
+        import markdown2
+        parser = markdown2.Markdown(extras=list(_MARKDOWN_EXTRAS))
+        _markdown_parsers.parser = parser
+    return parser
+
+
+def _markdown_to_html(markdown_content):
+    """Convert markdown to HTML, reusing the result for previously converted content."""
+    key = blake2b(markdown_content.encode('utf-8'), digest_size=16).hexdigest()
+    
+    with _HTML_CACHE_LOCK:
+        html_content = _HTML_CACHE.get(key)
+        if html_content is not None:
+            _HTML_CACHE.move_to_end(key)
+            return html_content
+    
+    # convert() resets per-document state (link/header id tables) before parsing
+    html_content = _get_markdown_parser().convert(markdown_content)
+    
+    with _HTML_CACHE_LOCK:
+        _HTML_CACHE[key] = html_content
+        if len(_HTML_CACHE) > _HTML_CACHE_SIZE:
+            _HTML_CACHE.popitem(last=False)
+    
+    return html_content
 
 
 class ExportService:
@@ -46,13 +180,13 @@ class ExportService:
         Returns:
             tuple: (file_content, filename)
         """
-        # Add project header to markdown
-        header = f"# {project_name}\n\n"
-        header += f"*Generated on {datetime.now().strftime('%B %d, %Y')}*\n\n"
-        header += "---\n\n"
-        
-        # Combine header with content
-        full_content = header + documentation_content
+        # Add project header to markdown (built in a single string)
+        full_content = (
+            f"# {project_name}\n\n"
+            f"*Generated on {_format_export_date(date.today())}*\n\n"
+            f"---\n\n"
+            f"{documentation_content}"
+        )
         
         # Create filename
         filename = f"{self._sanitize_filename(project_name)}_documentation.md"
@@ -87,7 +221,7 @@ class ExportService:
         
         # Add generation date
         date_para = doc.add_paragraph()
-        date_run = date_para.add_run(f"Generated on {datetime.now().strftime('%B %d, %Y')}")
+        date_run = date_para.add_run(f"Generated on {_format_export_date(date.today())}")
         date_run.italic = True
         date_run.font.size = Pt(10)
         date_run.font.color.rgb = RGBColor(128, 128, 128)
@@ -102,12 +236,11 @@ class ExportService:
         # Save to bytes
         file_stream = io.BytesIO()
         doc.save(file_stream)
-        file_stream.seek(0)
         
         # Create filename
         filename = f"{self._sanitize_filename(project_name)}_documentation.docx"
         
-        return file_stream.read(), filename
+        return file_stream.getvalue(), filename
     
     def export_pdf(self, project_name, documentation_content):
         """
@@ -123,32 +256,63 @@ class ExportService:
         Raises:
             RuntimeError: If WeasyPrint is not available
         """
+        # Fail fast when WeasyPrint is missing instead of paying a worker round trip
+        # (missing GTK libraries are still only detected by the worker's import)
+        pdf_bytes = None
+        if _weasyprint_installed():
+            full_html = self._build_pdf_html(project_name, documentation_content)
+            
+            # Generate PDF in a worker process so concurrent exports use separate cores
+            # (WeasyPrint is only imported there)
+            pool = _get_pdf_pool()
+            try:
+                pdf_bytes = pool.submit(render_pdf, full_html).result()
+            except BrokenProcessPool:
+                _reset_pdf_pool(pool)
+                raise
+        
         # Check if WeasyPrint is available
-        if not WEASYPRINT_AVAILABLE:
+        if pdf_bytes is None:
             raise RuntimeError(
                 "PDF export is not available. WeasyPrint requires GTK libraries. "
                 "On Windows, you can download GTK from: https://github.com/tschoonj/GTK-for-Windows-Runtime-Environment-Installer/releases "
                 "Or use Markdown (.md) or DOCX (.docx) export instead."
             )
         
-        # Convert markdown to HTML
-        html_content = markdown2.markdown(
-            documentation_content,
-            extras=['fenced-code-blocks', 'tables', 'header-ids']
-        )
+        # Create filename
+        filename = f"{self._sanitize_filename(project_name)}_documentation.pdf"
+        
+        return pdf_bytes, filename
+    
+    def _build_pdf_html(self, project_name, documentation_content):
+        """
+        Build the full HTML document rendered into the PDF export.
+        
+        Args:
+            project_name: Name of the project
+            documentation_content: Markdown content string
+            
+        Returns:
+            str: HTML document (styled by the module-level PDF stylesheet)
+        """
+        # Convert markdown to HTML (cached for repeated exports of the same content)
+        html_content = _markdown_to_html(documentation_content)
+        
+        generated_on = _format_export_date(date.today())
+        safe_project_name = html.escape(project_name)
         
         # Create full HTML document with styling
-        full_html = f"""
+        return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="utf-8">
-            <title>{project_name} - Documentation</title>
+            <title>{safe_project_name} - Documentation</title>
         </head>
         <body>
             <div class="header">
-                <h1>{project_name}</h1>
-                <p class="date">Generated on {datetime.now().strftime('%B %d, %Y')}</p>
+                <h1>{safe_project_name}</h1>
+                <p class="date">Generated on {generated_on}</p>
                 <hr>
             </div>
             <div class="content">
@@ -157,183 +321,6 @@ class ExportService:
         </body>
         </html>
         """
-        
-        # CSS styling for PDF
-        css = CSS(string="""
-            @page {
-                size: A4;
-                margin: 2cm;
-                @top-center {
-                    content: string(project-name);
-                    font-size: 10pt;
-                    color: #666;
-                }
-                @bottom-center {
-                    content: "Page " counter(page) " of " counter(pages);
-                    font-size: 10pt;
-                    color: #666;
-                }
-            }
-            
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-                color: #333;
-                max-width: 100%;
-            }
-            
-            .header {
-                text-align: center;
-                margin-bottom: 30px;
-            }
-            
-            .header h1 {
-                font-size: 32pt;
-                color: #1e40af;
-                margin-bottom: 10px;
-                string-set: project-name content();
-            }
-            
-            .header .date {
-                font-size: 11pt;
-                color: #666;
-                font-style: italic;
-            }
-            
-            .header hr {
-                border: none;
-                border-top: 2px solid #3b82f6;
-                margin: 20px 0;
-            }
-            
-            .content h1 {
-                font-size: 24pt;
-                color: #1e40af;
-                margin-top: 30px;
-                margin-bottom: 15px;
-                border-bottom: 2px solid #3b82f6;
-                padding-bottom: 5px;
-            }
-            
-            .content h2 {
-                font-size: 20pt;
-                color: #1e40af;
-                margin-top: 25px;
-                margin-bottom: 12px;
-            }
-            
-            .content h3 {
-                font-size: 16pt;
-                color: #2563eb;
-                margin-top: 20px;
-                margin-bottom: 10px;
-            }
-            
-            .content h4 {
-                font-size: 14pt;
-                color: #2563eb;
-                margin-top: 15px;
-                margin-bottom: 8px;
-            }
-            
-            .content p {
-                margin-bottom: 12px;
-                text-align: justify;
-            }
-            
-            .content ul, .content ol {
-                margin-left: 25px;
-                margin-bottom: 15px;
-            }
-            
-            .content li {
-                margin-bottom: 5px;
-            }
-            
-            .content code {
-                background-color: #f3f4f6;
-                padding: 2px 6px;
-                border-radius: 3px;
-                font-family: 'Courier New', monospace;
-                font-size: 10pt;
-                color: #dc2626;
-            }
-            
-            .content pre {
-                background-color: #1e293b;
-                color: #e2e8f0;
-                padding: 15px;
-                border-radius: 5px;
-                overflow-x: auto;
-                margin-bottom: 15px;
-                font-family: 'Courier New', monospace;
-                font-size: 9pt;
-                line-height: 1.4;
-            }
-            
-            .content pre code {
-                background-color: transparent;
-                padding: 0;
-                color: inherit;
-            }
-            
-            .content blockquote {
-                border-left: 4px solid #3b82f6;
-                padding-left: 15px;
-                margin-left: 0;
-                color: #666;
-                font-style: italic;
-            }
-            
-            .content table {
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 20px;
-            }
-            
-            .content table th {
-                background-color: #3b82f6;
-                color: white;
-                padding: 10px;
-                text-align: left;
-                font-weight: bold;
-            }
-            
-            .content table td {
-                border: 1px solid #ddd;
-                padding: 8px;
-            }
-            
-            .content table tr:nth-child(even) {
-                background-color: #f9fafb;
-            }
-            
-            .content a {
-                color: #3b82f6;
-                text-decoration: none;
-            }
-            
-            .content a:hover {
-                text-decoration: underline;
-            }
-            
-            /* Page break control */
-            h1, h2, h3 {
-                page-break-after: avoid;
-            }
-            
-            pre, table {
-                page-break-inside: avoid;
-            }
-        """)
-        
-        # Generate PDF
-        pdf_bytes = HTML(string=full_html).write_pdf(stylesheets=[css])
-        
-        # Create filename
-        filename = f"{self._sanitize_filename(project_name)}_documentation.pdf"
-        
-        return pdf_bytes, filename
     
     def _add_markdown_to_docx(self, doc, markdown_content):
         """
@@ -343,82 +330,22 @@ class ExportService:
             doc: python-docx Document object
             markdown_content: Markdown string
         """
-        lines = markdown_content.split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].rstrip()
-            
-            # Skip empty lines
-            if not line:
-                i += 1
-                continue
-            
-            # Headings (## Heading)
-            if line.startswith('#'):
-                level = len(line) - len(line.lstrip('#'))
-                text = line.lstrip('#').strip()
-                
-                if level == 1:
-                    heading = doc.add_heading(text, level=1)
-                elif level == 2:
-                    heading = doc.add_heading(text, level=2)
-                elif level == 3:
-                    heading = doc.add_heading(text, level=3)
-                else:
-                    heading = doc.add_heading(text, level=4)
-                
-                i += 1
-                continue
-            
-            # Bullet lists (- item or * item)
-            if line.startswith('- ') or line.startswith('* ') or line.startswith('• '):
-                # Collect all list items
-                list_items = []
-                while i < len(lines):
-                    current_line = lines[i].rstrip()
-                    if current_line.startswith('- ') or current_line.startswith('* ') or current_line.startswith('• '):
-                        list_items.append(current_line[2:].strip())
-                        i += 1
-                    elif not current_line:
-                        i += 1
-                        break
-                    else:
-                        break
-                
-                # Add list items
-                for item in list_items:
-                    para = doc.add_paragraph(style='List Bullet')
-                    self._add_formatted_text(para, item)
-                
+        # Classify each line once, then emit one paragraph per non-blank line
+        for kind, text, level in map(_classify_markdown_line, markdown_content.split('\n')):
+            if kind == 'blank':
                 continue
             
-            # Numbered lists (1. item)
-            if re.match(r'^\d+\.\s', line):
-                # Collect all list items
-                list_items = []
-                while i < len(lines):
-                    current_line = lines[i].rstrip()
-                    if re.match(r'^\d+\.\s', current_line):
-                        list_items.append(re.sub(r'^\d+\.\s', '', current_line))
-                        i += 1
-                    elif not current_line:
-                        i += 1
-                        break
-                    else:
-                        break
-                
-                # Add list items
-                for item in list_items:
-                    para = doc.add_paragraph(style='List Number')
-                    self._add_formatted_text(para, item)
-                
-                continue
-            
-            # Regular paragraphs
-            para = doc.add_paragraph()
-            self._add_formatted_text(para, line)
-            i += 1
+            if kind == 'heading':
+                doc.add_heading(text, level=level)
+            elif kind == 'bullet':
+                para = doc.add_paragraph(style='List Bullet')
+                self._add_formatted_text(para, text)
+            elif kind == 'numbered':
+                para = doc.add_paragraph(style='List Number')
+                self._add_formatted_text(para, text)
+            else:
+                para = doc.add_paragraph()
+                self._add_formatted_text(para, text)
     
     def _add_formatted_text(self, paragraph, text):
         """
@@ -428,76 +355,29 @@ class ExportService:
             paragraph: python-docx Paragraph object
             text: Text string with markdown formatting
         """
-        # Parse inline formatting
-        parts = []
-        current = ""
-        i = 0
+        # Add runs while parsing: text between matches is normal, each match is one styled span
+        add_run = paragraph.add_run
+        prev_end = 0
         
-        while i < len(text):
-            # Bold (**text**)
-            if text[i:i+2] == '**':
-                if current:
-                    parts.append(('normal', current))
-                    current = ""
-                
-                # Find closing **
-                end = text.find('**', i + 2)
-                if end != -1:
-                    parts.append(('bold', text[i+2:end]))
-                    i = end + 2
-                else:
-                    current += text[i]
-                    i += 1
-            
-            # Code (`code`)
-            elif text[i] == '`':
-                if current:
-                    parts.append(('normal', current))
-                    current = ""
-                
-                # Find closing `
-                end = text.find('`', i + 1)
-                if end != -1:
-                    parts.append(('code', text[i+1:end]))
-                    i = end + 1
-                else:
-                    current += text[i]
-                    i += 1
-            
-            # Italic (*text*)
-            elif text[i] == '*':
-                if current:
-                    parts.append(('normal', current))
-                    current = ""
-                
-                # Find closing *
-                end = text.find('*', i + 1)
-                if end != -1:
-                    parts.append(('italic', text[i+1:end]))
-                    i = end + 1
-                else:
-                    current += text[i]
-                    i += 1
-            
-            else:
-                current += text[i]
-                i += 1
-        
-        if current:
-            parts.append(('normal', current))
-        
-        # Add runs with formatting
-        for style, content in parts:
-            run = paragraph.add_run(content)
-            
-            if style == 'bold':
-                run.bold = True
-            elif style == 'italic':
-                run.italic = True
-            elif style == 'code':
+        for match in _INLINE_FORMAT_RE.finditer(text):
+            if match.start() > prev_end:
+                add_run(text[prev_end:match.start()])
+            
+            bold, code, italic = match.groups()
+            if bold is not None:
+                add_run(bold).bold = True
+            elif code is not None:
+                run = add_run(code)
                 run.font.name = 'Courier New'
                 run.font.size = Pt(10)
                 run.font.color.rgb = RGBColor(220, 38, 38)
+            else:
+                add_run(italic).italic = True
+            
+            prev_end = match.end()
+        
+        if prev_end < len(text):
+            add_run(text[prev_end:])
     
     def _sanitize_filename(self, name):
         """
@@ -510,7 +390,7 @@ class ExportService:
             str: Sanitized filename
         """
         # Remove or replace invalid characters
-        name = re.sub(r'[<>:"/\\|?*]', '', name)
+        name = _INVALID_FILENAME_RE.sub('', name)
         name = name.strip()
         name = name.replace(' ', '_')
         
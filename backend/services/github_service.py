@@ -2,12 +2,96 @@
 GitHub service for cloning and fetching repository contents.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from github import Github, GithubException
 import git
+import hashlib
 import os
 import shutil
 import tempfile
+import threading
+import time
+from config.settings import Config
 from utils.helpers import parse_github_url
+from utils.validators import validate_file_extension
+
+
+# GitHub API results reused for repeated lookups of the same repository
+_API_CACHE_TTL_SECONDS = 60
+_API_CACHE_MAX_ENTRIES = 512
+_api_cache = {}  # key -> (expires_at, value)
+_api_cache_lock = threading.Lock()
+
+
+def _api_cache_get(key):
+    """Get a cached GitHub API result, or None if missing or expired."""
+    with _api_cache_lock:
+        entry = _api_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _api_cache[key]
+            return None
+        return entry[1]
+
+
+def _api_cache_set(key, value):
+    """Cache a GitHub API result for _API_CACHE_TTL_SECONDS."""
+    now = time.monotonic()
+    with _api_cache_lock:
+        if len(_api_cache) >= _API_CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest if still full
+            for expired_key in [k for k, (expires_at, _) in _api_cache.items() if expires_at < now]:
+                del _api_cache[expired_key]
+            if len(_api_cache) >= _API_CACHE_MAX_ENTRIES:
+                del _api_cache[next(iter(_api_cache))]
+        _api_cache[key] = (now + _API_CACHE_TTL_SECONDS, value)
+
+
+def _remove_repo_dir(repo_path):
+    """Delete a cloned repository directory, ignoring files that can't be removed."""
+    shutil.rmtree(repo_path, ignore_errors=True)
+    print(f"Cleaned up repository at {repo_path}")
+
+
+# Concurrent file reads in read_files_batch (reads release the GIL)
+_MAX_READ_WORKERS = 16
+
+# Directories never included in the file tree (VCS metadata, dependencies, build output)
+_SKIP_DIRS = frozenset({'.git', 'node_modules', '__pycache__', 'venv', 'env', '.venv', 'dist', 'build'})
+
+
+def _iter_repo_files(directory, prefix_len):
+    """
+    Yield file paths under a directory, relative to the repository root.
+    
+    Same order as os.walk: a directory's files first, then its subdirectories.
+    Symlinked directories are not followed and unreadable directories are skipped.
+    
+    Args:
+        directory: Directory to scan
+        prefix_len: Length of the repository root path including its separator
+    """
+    subdirs = []
+    
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # DirEntry caches type info from the directory listing - no extra stat calls
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if not is_dir:
+                    yield entry.path[prefix_len:]
+                elif entry.name not in _SKIP_DIRS and not entry.is_symlink():
+                    subdirs.append(entry.path)
+    except OSError:
+        return
+    
+    for subdir in subdirs:
+        yield from _iter_repo_files(subdir, prefix_len)
 
 
 class GitHubService:
@@ -22,6 +106,9 @@ class GitHubService:
         """
         self.access_token = access_token
         self.github_client = Github(access_token) if access_token else Github()
+        
+        # Identifies the caller's access level in cache keys without storing the token itself
+        self._token_key = hashlib.sha256(access_token.encode('utf-8')).hexdigest()[:16] if access_token else None
     
     def clone_repository(self, repo_url, branch='main', target_dir=None):
         """
@@ -65,7 +152,8 @@ class GitHubService:
                 clone_url,
                 target_dir,
                 branch=branch,
-                depth=1  # Shallow clone for faster download
+                depth=1,  # Shallow clone for faster download
+                multi_options=['--single-branch', '--no-tags']  # Only the requested branch, no tag refs
             )
             
             print(f"Repository cloned successfully to temporary directory")
@@ -95,24 +183,51 @@ class GitHubService:
             if not owner or not repo_name:
                 raise ValueError("Invalid GitHub URL")
             
-            repo = self.github_client.get_repo(f"{owner}/{repo_name}")
-            
-            return {
-                'name': repo.name,
-                'full_name': repo.full_name,
-                'description': repo.description,
-                'language': repo.language,
-                'default_branch': repo.default_branch,
-                'size': repo.size,
-                'stars': repo.stargazers_count,
-                'forks': repo.forks_count,
-                'private': repo.private,
-            }
+            return dict(self._get_repo_info_cached(owner, repo_name))
         
         except GithubException as e:
             print(f"GitHub API error: {e}")
             return None
     
+    def _get_repo_info_cached(self, owner, repo_name):
+        """
+        Fetch repository information, reusing a recent result for the same repo and token.
+        
+        Shared by get_repository_info and validate_access so a validate-then-info
+        sequence makes a single GitHub API request.
+        
+        Args:
+            owner: Repository owner
+            repo_name: Repository name
+            
+        Returns:
+            dict: Repository information (shared cache entry - do not modify)
+            
+        Raises:
+            GithubException: If the repository can't be accessed (failures are not cached)
+        """
+        cache_key = (owner, repo_name, self._token_key)
+        info = _api_cache_get(cache_key)
+        if info is not None:
+            return info
+        
+        repo = self.github_client.get_repo(f"{owner}/{repo_name}")
+        
+        info = {
+            'name': repo.name,
+            'full_name': repo.full_name,
+            'description': repo.description,
+            'language': repo.language,
+            'default_branch': repo.default_branch,
+            'size': repo.size,
+            'stars': repo.stargazers_count,
+            'forks': repo.forks_count,
+            'private': repo.private,
+        }
+        _api_cache_set(cache_key, info)
+        
+        return info
+    
     def get_file_tree(self, local_repo_path):
         """
         Get list of all files in cloned repository.
@@ -123,27 +238,11 @@ class GitHubService:
         Returns:
             list: List of file paths relative to repo root
         """
-        files = []
-        
-        # Walk through directory
-        for root, dirs, filenames in os.walk(local_repo_path):
-            # Skip .git directory
-            if '.git' in dirs:
-                dirs.remove('.git')
-            
-            # Skip node_modules and other common directories
-            skip_dirs = ['node_modules', '__pycache__', 'venv', 'env', '.venv', 'dist', 'build']
-            for skip_dir in skip_dirs:
-                if skip_dir in dirs:
-                    dirs.remove(skip_dir)
-            
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                # Get relative path
-                rel_path = os.path.relpath(file_path, local_repo_path)
-                files.append(rel_path)
+        # Every scanned path starts with the repo path, so relative paths are a slice
+        prefix_len = len(os.path.join(local_repo_path, ''))
         
-        return files
+        # Walk through directory, skipping .git, node_modules and other common directories
+        return list(_iter_repo_files(local_repo_path, prefix_len))
     
     def read_file(self, repo_path, file_path):
         """
@@ -154,11 +253,19 @@ class GitHubService:
             file_path: Relative path to file
             
         Returns:
-            str: File content
+            str: File content, or None if unreadable, not a code file, or too large to analyze
         """
         try:
+            # Skip binaries and oversized files (e.g. bundles) without opening them
+            if not validate_file_extension(file_path):
+                return None
+            
             full_path = os.path.join(repo_path, file_path)
             
+            if os.path.getsize(full_path) > Config.MAX_FILE_SIZE_FOR_ANALYSIS:
+                print(f"Skipping large file {file_path}")
+                return None
+            
             with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
             
@@ -168,17 +275,38 @@ class GitHubService:
             print(f"Error reading file {file_path}: {e}")
             return None
     
+    def read_files_batch(self, repo_path, file_paths, max_workers=_MAX_READ_WORKERS):
+        """
+        Read multiple files from cloned repository concurrently.
+        
+        Args:
+            repo_path: Path to local repository
+            file_paths: List of relative file paths
+            max_workers: Maximum concurrent reads
+            
+        Returns:
+            dict: {file_path: content}, in input order (content is None if unreadable)
+        """
+        if not file_paths:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            contents = executor.map(lambda file_path: self.read_file(repo_path, file_path), file_paths)
+            return dict(zip(file_paths, contents))
+    
     def cleanup_repo(self, repo_path):
         """
-        Delete cloned repository directory.
+        Delete cloned repository directory in the background.
+        
+        Returns immediately; the directory is removed on a daemon thread so
+        the request doesn't wait on deleting every file in the clone.
         
         Args:
             repo_path: Path to repository
         """
         try:
             if os.path.exists(repo_path):
-                shutil.rmtree(repo_path)
-                print(f"Cleaned up repository at {repo_path}")
+                threading.Thread(target=_remove_repo_dir, args=(repo_path,), daemon=True).start()
         except Exception as e:
             print(f"Error cleaning up repository: {e}")
     
@@ -197,9 +325,8 @@ class GitHubService:
             if not owner or not repo_name:
                 return False
             
-            repo = self.github_client.get_repo(f"{owner}/{repo_name}")
-            # Try to access repo name (will fail if no access)
-            _ = repo.name
+            # Fetching the repository info fails if there is no access
+            self._get_repo_info_cached(owner, repo_name)
             return True
         
         except GithubException:
@@ -3,11 +3,157 @@ RAG (Retrieval-Augmented Generation) service for intelligent code queries.
 Combines vector similarity search with Claude AI.
 """
 
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from hashlib import md5
+from itertools import islice
 from services.embedding_service import EmbeddingService
 from services.claude_service import ClaudeService
 from models.embedding import Embedding
 
 
+def _question_key(question):
+    """Normalize a question for exact-match answer reuse (case, whitespace, trailing punctuation)."""
+    return ' '.join(question.casefold().split()).rstrip('?!. ')
+
+
+class _AnswerCache:
+    """
+    Recent answers per project, reused only when the normalized question is identical.
+    Thread-safe implementation using locks.
+    """
+    
+    def __init__(self, max_projects=64, max_entries_per_project=32, ttl_seconds=3600):
+        """
+        Initialize cache limits.
+        
+        Args:
+            max_projects: Projects kept, least recently used evicted first
+            max_entries_per_project: Answers kept per project, least recently used evicted first
+            ttl_seconds: Seconds before an answer expires (default: 1 hour)
+        """
+        self._projects = OrderedDict()  # project_id -> OrderedDict(question key -> (answer, sources, stored_at))
+        self._max_projects = max_projects
+        self._max_entries = max_entries_per_project
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+    
+    def get(self, project_id, question_key):
+        """
+        Get the stored answer to a question.
+        
+        Args:
+            project_id: UUID of the project
+            question_key: Normalized question (see _question_key)
+            
+        Returns:
+            dict: {message, sources} or None if the question has no fresh answer
+        """
+        key = str(project_id)
+        
+        with self._lock:
+            entries = self._projects.get(key)
+            entry = entries.get(question_key) if entries else None
+            if entry is None:
+                return None
+            
+            if time.monotonic() - entry[2] > self._ttl_seconds:
+                del entries[question_key]
+                return None
+            
+            self._projects.move_to_end(key)
+            entries.move_to_end(question_key)
+        
+        return {'message': entry[0], 'sources': list(entry[1])}
+    
+    def add(self, project_id, question_key, answer, sources):
+        """Store an answer for a project's question."""
+        key = str(project_id)
+        
+        with self._lock:
+            entries = self._projects.get(key)
+            if entries is None:
+                entries = self._projects[key] = OrderedDict()
+            self._projects.move_to_end(key)
+            
+            entries[question_key] = (answer, tuple(sources), time.monotonic())
+            entries.move_to_end(question_key)
+            if len(entries) > self._max_entries:
+                entries.popitem(last=False)
+            
+            if len(self._projects) > self._max_projects:
+                self._projects.popitem(last=False)
+    
+    def invalidate(self, project_id):
+        """Drop all stored answers for a project (e.g. after reindexing or editing documentation)."""
+        with self._lock:
+            self._projects.pop(str(project_id), None)
+
+
+# Shared by all RAGService instances in this process
+_answer_cache = _AnswerCache()
+
+
+def invalidate_answers(project_id):
+    """
+    Forget cached chat answers for a project whose documentation or index changed.
+    
+    Args:
+        project_id: UUID of the project
+    """
+    _answer_cache.invalidate(project_id)
+
+
+# Code files embedded and inserted per chunk (fills every concurrent embedding sub-batch)
+_INDEX_CHUNK_SIZE = 256
+
+
+class _StoredRows:
+    """
+    Embeddings already stored for a project, claimed by unchanged chunks during a reindex.
+    Rows left unclaimed once indexing has finished belong to removed or changed content.
+    """
+    
+    def __init__(self, rows):
+        """
+        Group stored rows by content digest.
+        
+        Args:
+            rows: Iterable of (id, content_md5) tuples
+        """
+        self._ids = defaultdict(list)  # content md5 -> [row ids]
+        for embedding_id, content_md5 in rows:
+            self._ids[content_md5].append(embedding_id)
+        
+        # Cleared when any chunk fails to embed or store, so stale rows are kept
+        self.complete = True
+    
+    def claim(self, text):
+        """
+        Claim the stored row for a chunk if its text is unchanged.
+        
+        The stored text starts with the file or section name, so the digest
+        pins the row to that file or section whatever its position; chunk
+        indexes shift as files are added or removed and are display-only.
+        
+        Args:
+            text: Formatted text the chunk would be embedded and stored as
+            
+        Returns:
+            bool: True if an identical row is stored and the chunk needs no embedding
+        """
+        ids = self._ids.get(md5(text.encode('utf-8')).hexdigest())
+        if not ids:
+            return False
+        ids.pop()
+        return True
+    
+    def unclaimed(self):
+        """Get the ids of stored rows no chunk has claimed."""
+        return [embedding_id for ids in self._ids.values() for embedding_id in ids]
+
+
 class RAGService:
     """Service for RAG-powered question answering."""
     
@@ -34,6 +180,12 @@ class RAGService:
             dict: {message: answer, sources: list of source files}
         """
         try:
+            # Reuse a recent answer to the same question (before paying for its embedding)
+            question_key = _question_key(question)
+            cached = _answer_cache.get(project_id, question_key)
+            if cached is not None:
+                return cached
+            
             # Step 1: Create embedding for question
             question_embedding = self.embedding_service.create_embedding(question)
             
@@ -68,8 +220,10 @@ class RAGService:
             # Step 4: Generate answer with Claude
             answer = self.claude_service.answer_question(question, context)
             
-            # Remove duplicates from sources
-            sources = list(set(sources))
+            # Remove duplicates from sources, keeping relevance order
+            sources = list(dict.fromkeys(sources))
+            
+            _answer_cache.add(project_id, question_key, answer, sources)
             
             return {
                 'message': answer,
@@ -83,134 +237,182 @@ class RAGService:
                 'sources': []
             }
     
-    def index_code_files(self, project_id, code_files):
+    def index_code_files(self, project_id, code_files, stored=None):
         """
         Create embeddings for code files and store them.
         
+        Files are embedded and inserted in chunks, so only one chunk's texts,
+        vectors and rows are held in memory at a time.
+        
         Args:
             project_id: UUID of the project
-            code_files: Dict of {filename: content}
+            code_files: Dict of {filename: content}, or iterable of (filename, content) pairs
+            stored: Optional _StoredRows already stored for the project; unchanged files
+                    are neither embedded nor inserted again
             
         Returns:
             int: Number of embeddings created
         """
-        count = 0
-        chunk_index = 0  # Track unique index for each file
+        # Skip if content is too short or empty (filtered lazily as files are consumed)
+        items = code_files.items() if isinstance(code_files, dict) else code_files
+        files_to_index = (
+            (filename, content)
+            for filename, content in items
+            if content and len(content) >= 50
+        )
         
-        for filename, content in code_files.items():
+        created = 0
+        chunk_index = 0  # Unique per file across chunks, assigned before embedding
+        while True:
+            chunk = dict(islice(files_to_index, _INDEX_CHUNK_SIZE))
+            if not chunk:
+                return created
+            
+            # Compare digests first, so unchanged files are never embedded
+            to_embed = {}
+            chunk_indexes = []
+            for filename, content in chunk.items():
+                text = self.embedding_service.code_file_text(filename, content)
+                if stored is None or not stored.claim(text):
+                    to_embed[filename] = content
+                    chunk_indexes.append(chunk_index)
+                chunk_index += 1
+            
+            if not to_embed:
+                continue
+            
             try:
-                # Skip if content is too short or empty
-                if not content or len(content) < 50:
+                # Create embeddings for the chunk in one batched call
+                results = self.embedding_service.embed_code_files_batch(to_embed)
+            except Exception as e:
+                # Retry one file at a time so a bad file only skips itself
+                print(f"Error indexing code files, retrying individually: {e}")
+                results = self._embed_each(self.embedding_service.embed_code_file, to_embed.items(), 'file')
+            
+            rows = []
+            for result, file_chunk_index in zip(results, chunk_indexes):
+                if result is None:
+                    if stored is not None:
+                        stored.complete = False
                     continue
                 
-                # Create embedding for file
-                result = self.embedding_service.embed_code_file(filename, content)
-                
-                # Add unique chunk_index to metadata
                 metadata = result.get('metadata', {})
-                metadata['chunk_index'] = chunk_index
-                chunk_index += 1
-                
-                # Store embedding
-                Embedding.create(
-                    project_id=project_id,
-                    content=result['text'],
-                    embedding_vector=result['embedding'],
-                    metadata=metadata
-                )
-                
-                count += 1
+                metadata['chunk_index'] = file_chunk_index
+                rows.append({
+                    'content': result['text'],
+                    'embedding_vector': result['embedding'],
+                    'metadata': metadata
+                })
             
+            try:
+                # Store the chunk's embeddings in a single insert
+                created += Embedding.bulk_create(project_id, rows)
             except Exception as e:
-                print(f"Error indexing file {filename}: {e}")
-                continue
-        
-        return count
+                # Skip this chunk and carry on with the next one
+                print(f"Error storing code files embeddings: {e}")
+                if stored is not None:
+                    stored.complete = False
     
-    def index_documentation(self, project_id, sections):
+    def index_documentation(self, project_id, sections, stored=None):
         """
         Create embeddings for documentation sections.
         
         Args:
             project_id: UUID of the project
             sections: List of section objects OR Dict of {section_name: content} (backwards compatible)
+            stored: Optional _StoredRows already stored for the project; unchanged sections
+                    are neither embedded nor inserted again
             
         Returns:
             int: Number of embeddings created
         """
-        count = 0
-        chunk_index = 1000  # Start from 1000 to avoid conflicts with code files
-        
         # Handle both list (new format) and dict (old format)
         if isinstance(sections, list):
             # New format: list of section objects
-            for section in sections:
-                try:
-                    section_name = section.get('title', 'Unknown Section')
-                    content = section.get('content', '')
-                    
-                    # Skip if content is too short or empty
-                    if not content or len(content) < 50:
-                        continue
-                    
-                    # Create embedding for section
-                    result = self.embedding_service.embed_documentation(section_name, content)
-                    
-                    # Add unique chunk_index and section metadata
-                    metadata = result.get('metadata', {})
-                    metadata['chunk_index'] = chunk_index
-                    metadata['section_type'] = section.get('type', '')
-                    metadata['section_title'] = section_name
-                    chunk_index += 1
-                    
-                    # Store embedding
-                    Embedding.create(
-                        project_id=project_id,
-                        content=result['text'],
-                        embedding_vector=result['embedding'],
-                        metadata=metadata
-                    )
-                    
-                    count += 1
-                
-                except Exception as e:
-                    print(f"Error indexing section {section_name}: {e}")
-                    continue
+            section_items = [
+                (section.get('title', 'Unknown Section'), section.get('content', ''), section.get('type', ''))
+                for section in sections
+            ]
         else:
             # Old format: dict of section_name: content
-            for section_name, content in sections.items():
-                try:
-                    # Skip if content is too short or empty
-                    if not content or len(content) < 50:
-                        continue
-                    
-                    # Create embedding for section
-                    result = self.embedding_service.embed_documentation(section_name, content)
-                    
-                    # Add unique chunk_index to metadata
-                    metadata = result.get('metadata', {})
-                    metadata['chunk_index'] = chunk_index
-                    chunk_index += 1
-                    
-                    # Store embedding
-                    Embedding.create(
-                        project_id=project_id,
-                        content=result['text'],
-                        embedding_vector=result['embedding'],
-                        metadata=metadata
-                    )
-                    
-                    count += 1
-                
-                except Exception as e:
-                    print(f"Error indexing section {section_name}: {e}")
-                    continue
+            section_items = [(section_name, content, None) for section_name, content in sections.items()]
+        
+        # Skip if content is too short or empty
+        section_items = [item for item in section_items if item[1] and len(item[1]) >= 50]
         
-        return count
+        # Number from 1000 to avoid conflicts with code files; compare digests first,
+        # so unchanged sections are never embedded
+        section_items = [
+            (chunk_index, section_name, content, section_type)
+            for chunk_index, (section_name, content, section_type) in enumerate(section_items, start=1000)
+            if stored is None or not stored.claim(self.embedding_service.documentation_text(section_name, content))
+        ]
+        if not section_items:
+            return 0
+        
+        to_embed = [(section_name, content) for _, section_name, content, _ in section_items]
+        try:
+            # Create embeddings for all sections in one batched request
+            results = self.embedding_service.embed_documentation_batch(to_embed)
+        except Exception as e:
+            # Retry one section at a time so a bad section only skips itself
+            print(f"Error indexing documentation, retrying individually: {e}")
+            results = self._embed_each(self.embedding_service.embed_documentation, to_embed, 'section')
+        
+        rows = []
+        for result, (chunk_index, section_name, _, section_type) in zip(results, section_items):
+            if result is None:
+                if stored is not None:
+                    stored.complete = False
+                continue
+            
+            metadata = result.get('metadata', {})
+            metadata['chunk_index'] = chunk_index
+            
+            # Section metadata (new format only)
+            if section_type is not None:
+                metadata['section_type'] = section_type
+                metadata['section_title'] = section_name
+            
+            rows.append({
+                'content': result['text'],
+                'embedding_vector': result['embedding'],
+                'metadata': metadata
+            })
+        
+        try:
+            # Store all embeddings in a single insert
+            return Embedding.bulk_create(project_id, rows)
+        except Exception as e:
+            print(f"Error storing documentation embeddings: {e}")
+            if stored is not None:
+                stored.complete = False
+            return 0
+    
+    def _embed_each(self, embed, items, kind):
+        """
+        Embed items one at a time, after their batched request failed.
+        
+        Args:
+            embed: Single-item embedding method, called as embed(name, content)
+            items: Iterable of (name, content) pairs
+            kind: Item description for error messages ('file' or 'section')
+            
+        Returns:
+            list: Embedding results in item order, None for items that failed
+        """
+        results = []
+        for name, content in items:
+            try:
+                results.append(embed(name, content))
+            except Exception as e:
+                print(f"Error indexing {kind} {name}: {e}")
+                results.append(None)
+        return results
     
     def reindex_project(self, project_id, code_files, documentation_sections):
         """
-        Reindex entire project (delete old embeddings and create new ones).
+        Reindex entire project, keeping stored embeddings whose content is unchanged.
         
         Args:
             project_id: UUID of the project
@@ -220,17 +422,27 @@ class RAGService:
         Returns:
             int: Total number of embeddings created
         """
-        # Delete existing embeddings
-        Embedding.delete_by_project_id(project_id)
+        # Stored rows by content digest; rows left unclaimed after indexing are stale
+        stored = _StoredRows(Embedding.get_content_hashes(project_id))
         
         # Index code files
-        code_count = self.index_code_files(project_id, code_files)
+        code_count = self.index_code_files(project_id, code_files, stored)
         
         # Index documentation
-        doc_count = self.index_documentation(project_id, documentation_sections)
+        doc_count = self.index_documentation(project_id, documentation_sections, stored)
+        
+        # Delete embeddings of removed or changed content, only once everything new is stored
+        removed = 0
+        if stored.complete:
+            removed = Embedding.delete_by_ids(stored.unclaimed())
+        else:
+            print(f"Reindex of project {project_id} incomplete, keeping previous embeddings")
         
         total = code_count + doc_count
-        print(f"Reindexed project {project_id}: {total} embeddings created")
+        if total or removed:
+            # Answers based on the old embeddings are now stale
+            invalidate_answers(project_id)
+        
+        print(f"Reindexed project {project_id}: {total} embeddings created, {removed} removed")
         
         return total
-
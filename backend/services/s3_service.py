@@ -3,22 +3,56 @@ AWS S3 service for file upload and download operations.
 """
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import Config
+from functools import lru_cache
+import io
 import os
 
+# Objects above 8MB are transferred as parallel multipart uploads / ranged GETs
+_MULTIPART_SIZE = 8 * 1024 * 1024
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=_MULTIPART_SIZE,
+    multipart_chunksize=_MULTIPART_SIZE,
+    max_concurrency=10,
+    use_threads=True
+)
+
+# delete_objects accepts at most 1000 keys per request
+_DELETE_BATCH_SIZE = 1000
+_MAX_DELETE_WORKERS = 8
+
+
+@lru_cache(maxsize=1)
+def _get_s3_client():
+    """
+    Get the process-wide S3 client, creating it on first use.
+    
+    boto3 clients are thread-safe, so every S3Service shares one client and its
+    connection pool instead of opening new TLS connections per request.
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
+        region_name=Config.AWS_REGION,
+        config=BotoConfig(
+            max_pool_connections=50,  # Room for concurrent multipart transfers and deletes
+            retries={'mode': 'adaptive', 'max_attempts': 5},
+            tcp_keepalive=True
+        )
+    )
+
 
 class S3Service:
     """Service for interacting with AWS S3."""
     
     def __init__(self):
-        """Initialize S3 client with AWS credentials."""
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
-            region_name=Config.AWS_REGION
-        )
+        """Initialize with the shared S3 client."""
+        self.s3_client = _get_s3_client()
         self.bucket_name = Config.S3_BUCKET_NAME
     
     def upload_file(self, file_obj, s3_key):
@@ -39,10 +73,10 @@ class S3Service:
             # Upload file
             if isinstance(file_obj, str):
                 # File path provided
-                self.s3_client.upload_file(file_obj, self.bucket_name, s3_key)
+                self.s3_client.upload_file(file_obj, self.bucket_name, s3_key, Config=_TRANSFER_CONFIG)
             else:
                 # File object provided
-                self.s3_client.upload_fileobj(file_obj, self.bucket_name, s3_key)
+                self.s3_client.upload_fileobj(file_obj, self.bucket_name, s3_key, Config=_TRANSFER_CONFIG)
             
             # Return S3 URL
             return f"s3://{self.bucket_name}/{s3_key}"
@@ -70,7 +104,7 @@ class S3Service:
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
             
             # Download file
-            self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            self.s3_client.download_file(self.bucket_name, s3_key, local_path, Config=_TRANSFER_CONFIG)
             
             return local_path
         
@@ -92,9 +126,10 @@ class S3Service:
             Exception: If read fails
         """
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            content = response['Body'].read().decode('utf-8')
-            return content
+            # Large objects are fetched as concurrent ranged GETs instead of one serial stream
+            buffer = io.BytesIO()
+            self.s3_client.download_fileobj(self.bucket_name, s3_key, buffer, Config=_TRANSFER_CONFIG)
+            return buffer.getvalue().decode('utf-8')
         
         except ClientError as e:
             print(f"S3 read error: {e}")
@@ -111,15 +146,13 @@ class S3Service:
             list: List of file keys
         """
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
-            
-            if 'Contents' not in response:
-                return []
-            
-            return [obj['Key'] for obj in response['Contents']]
+            # Each list_objects_v2 page holds at most 1000 keys, so follow every page
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            return [
+                obj['Key']
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            ]
         
         except ClientError as e:
             print(f"S3 list error: {e}")
@@ -160,15 +193,24 @@ class S3Service:
             if not files:
                 return 0
             
-            # Delete files
-            objects = [{'Key': key} for key in files]
-            response = self.s3_client.delete_objects(
-                Bucket=self.bucket_name,
-                Delete={'Objects': objects}
-            )
+            # Delete files in batches of up to 1000 keys, several requests at a time
+            batches = [
+                [{'Key': key} for key in files[i:i + _DELETE_BATCH_SIZE]]
+                for i in range(0, len(files), _DELETE_BATCH_SIZE)
+            ]
+            
+            def delete_batch(objects):
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': objects}
+                )
+                return len(response.get('Deleted', []))
+            
+            if len(batches) == 1:
+                return delete_batch(batches[0])
             
-            deleted = len(response.get('Deleted', []))
-            return deleted
+            with ThreadPoolExecutor(max_workers=min(_MAX_DELETE_WORKERS, len(batches))) as executor:
+                return sum(executor.map(delete_batch, batches))
         
         except ClientError as e:
             print(f"S3 delete folder error: {e}")
@@ -3,15 +3,194 @@ Security analyzer service using Claude AI to detect vulnerabilities.
 """
 
 from services.claude_service import ClaudeService
+from config.settings import Config
+from utils.disk_cache import DiskCache
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+import heapq
 import json
+import re
+
+# orjson is optional - parses Claude's JSON arrays faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum Claude batch calls in flight at once
+_MAX_CONCURRENT_BATCHES = 5
+
+# Maximum characters of each file included in a batch prompt
+_MAX_FILE_CHARS_FOR_LLM = 5000
+
+# Limits for files packed into one Claude call (findings must fit its 4000 output tokens)
+_MAX_BATCH_CHARS = 30000
+_MAX_BATCH_FILES = 20
+
+# Static instructions leading every batch prompt, ahead of the per-batch file contents
+_BATCH_INSTRUCTIONS = """Analyze the code files below for security vulnerabilities.
+
+Find security issues in ANY of these files and return a JSON array. For each vulnerability:
+
+{
+  "file_path": "exact path from below",
+  "severity": "critical|high|medium|low|info",
+  "category": "SQL Injection|XSS|Auth|etc",
+  "title": "Brief title",
+  "description": "What's the issue",
+  "line_number": line number or null,
+  "recommendation": "How to fix"
+}
+
+Return ONLY the JSON array, no other text."""
+
+# Lines kept first when a file must be excerpted: dangerous calls, secrets, entry points
+_SECURITY_LINE_RE = re.compile(
+    r'\b(?:exec|eval|query|execute|sql|select|insert|password|passwd|secret|token|api_?key|'
+    r'subprocess|system|popen|pickle|yaml|innerHTML|dangerouslySetInnerHTML|'
+    r'import|require|def|function|route|auth)\b',
+    re.IGNORECASE
+)
+
+# Indicators of code worth a security review (dangerous calls, data access, secrets,
+# untrusted input, crypto, HTML sinks); files with none are not sent to Claude.
+# Deliberately broad substring matches - a false positive only costs a Claude call
+_RISK_INDICATOR_RE = re.compile(
+    r'eval|exec|system|popen|spawn|subprocess|child_process|shell|pickle|marshal|yaml|deserializ|'
+    r'select|insert|update|delete|query|cursor|sql|'
+    r'passw|secret|token|api_?key|private_?key|credential|auth|login|session|cookie|jwt|'
+    r'crypt|hash|md5|sha1|random|'
+    r'request|input|param|argv|environ|getenv|upload|open\(|readfile|path|url|redirect|'
+    r'innerhtml|document\.write|render_template_string|cors|csrf',
+    re.IGNORECASE
+)
+
+# Files analyzed first: backend source, then auth/database related paths
+_PRIORITY_EXTENSIONS = ('.py', '.js', '.jsx', '.ts', '.tsx', '.php', '.java', '.go')
+_PRIORITY_NAMES = ('auth', 'login', 'password', 'database', 'db', 'sql', 'api')
+
+
+def _file_priority(item):
+    """Sort key for a (file_path, content) pair; higher tuples are analyzed first."""
+    path = item[0].lower()
+    return (path.endswith(_PRIORITY_EXTENSIONS), any(name in path for name in _PRIORITY_NAMES))
+
+
+def _excerpt_for_prompt(content, budget=_MAX_FILE_CHARS_FOR_LLM):
+    """
+    Shorten a file to a character budget, preferring security-relevant lines.
+    
+    Lines matching _SECURITY_LINE_RE are kept first, then the remaining budget is
+    filled from the top of the file. Kept lines stay in file order, prefixed with
+    their line numbers so findings can still cite them; skipped runs become '...'.
+    
+    Args:
+        content: File content longer than the budget
+        budget: Maximum characters of kept lines, including line number prefixes
+        
+    Returns:
+        str: Excerpt of the file
+    """
+    lines = content.splitlines()
+    relevant = [i for i, line in enumerate(lines) if _SECURITY_LINE_RE.search(line)]
+    
+    keep = set()
+    used = 0
+    for i in relevant:
+        cost = len(lines[i].rstrip()) + len(str(i + 1)) + 3  # Line, number prefix and newline
+        if used + cost <= budget:
+            keep.add(i)
+            used += cost
+    
+    # Fill the rest with a contiguous run from the top of the file
+    for i in range(len(lines)):
+        if i in keep:
+            continue
+        cost = len(lines[i].rstrip()) + len(str(i + 1)) + 3
+        if used + cost > budget:
+            break
+        keep.add(i)
+        used += cost
+    
+    # No whole line fits (minified or bundled one-line files) - send the plain prefix
+    if not keep:
+        return content[:budget]
+    
+    parts = []
+    previous = -1
+    for i in sorted(keep):
+        if i != previous + 1:
+            parts.append('...')
+        parts.append(f"{i + 1}: {lines[i].rstrip()}")
+        previous = i
+    if previous != len(lines) - 1:
+        parts.append('...')
+    return '\n'.join(parts)
+
+
+# JSON array inside a (optionally ```json) fence, searched first so brackets in prose can't win
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\[.*\])\s*```", re.DOTALL | re.IGNORECASE)
+_JSON_DECODER = json.JSONDecoder()
+
+# Security score points deducted per finding, by severity
+_SEVERITY_PENALTIES = {
+    'critical': 20,
+    'high': 10,
+    'medium': 5,
+    'low': 2,
+    'info': 1,
+}
+
+
+def _decode_json_array(text):
+    """Decode the JSON value at the start of text, preferring orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # Trailing text after the array - fall back to the stdlib's raw_decode
+            pass
+    
+    value, _ = _JSON_DECODER.raw_decode(text)
+    return value
+
+
+def _extract_findings_array(claude_response):
+    """
+    Decode the JSON array of findings in a Claude response.
+    
+    Bare arrays are parsed with orjson when it is installed. A fenced block is searched
+    for before any bare bracket, so a '[note]' or '[2]' in the prose ahead of it can't
+    win. Otherwise decodes in place from the first '[' - raw_decode stops at the
+    matching bracket, so trailing prose needs no stripping or copying.
+    """
+    # A bare array is the requested format - parse it whole with orjson when installed
+    if orjson is not None:
+        text = claude_response.strip()
+        if text.startswith('[') and text.endswith(']'):
+            try:
+                return orjson.loads(text)
+            except orjson.JSONDecodeError:
+                pass
+    
+    match = _JSON_FENCE_RE.search(claude_response)
+    if match:
+        return _decode_json_array(match.group(1))
+    
+    start = claude_response.find('[')
+    if start == -1:
+        return _decode_json_array(claude_response.strip())
+    value, _ = _JSON_DECODER.raw_decode(claude_response, start)
+    return value
 
 
 class SecurityAnalyzer:
     """Service for analyzing code security."""
     
     def __init__(self):
-        """Initialize with Claude service."""
+        """Initialize with Claude service and persistent findings cache."""
         self.claude_service = ClaudeService()
+        self._cache = DiskCache(Config.ANALYSIS_CACHE_DIR, 'security')
     
     def analyze_file(self, filename, content):
         """
@@ -25,17 +204,22 @@ class SecurityAnalyzer:
             list: List of finding dicts
         """
         try:
-            # Get analysis from Claude
-            response = self.claude_service.find_security_vulnerabilities(content, filename)
+            # Reuse earlier findings for identical content analyzed by the same model
+            cache_key = self._cache_key(content, 'file')
+            findings = self._cache.get(cache_key)
             
-            # Parse JSON response
-            findings = self._parse_findings(response)
+            if findings is None:
+                # Get analysis from Claude
+                response = self.claude_service.find_security_vulnerabilities(content, filename)
+                
+                # Parse JSON response (empty results may be failures, so only findings are cached)
+                findings = self._parse_findings(response)
+                findings = [{key: value for key, value in finding.items() if key != 'file_path'} for finding in findings]
+                if findings:
+                    self._cache.set(cache_key, findings)
             
             # Add filename to each finding
-            for finding in findings:
-                finding['file_path'] = filename
-            
-            return findings
+            return [{**finding, 'file_path': filename} for finding in findings]
         
         except Exception as e:
             print(f"Error analyzing {filename}: {e}")
@@ -47,76 +231,177 @@ class SecurityAnalyzer:
         
         Args:
             code_files: Dict of {file_path: content}
-            max_files: Maximum files to analyze (default: 50 for performance)
+            max_files: Maximum files to analyze (default: 50 for performance; None for all)
             
         Returns:
             list: Combined list of all findings
         """
         all_findings = []
         
-        # Prioritize certain file types (backend, auth, database)
-        priority_extensions = ['.py', '.js', '.ts', '.php', '.java', '.go']
-        priority_names = ['auth', 'login', 'password', 'database', 'db', 'sql', 'api']
-        
-        # Sort files by priority (high-priority files analyzed first)
-        sorted_files = sorted(
-            code_files.items(),
-            key=lambda x: (
-                any(ext in x[0].lower() for ext in priority_extensions),
-                any(name in x[0].lower() for name in priority_names)
-            ),
-            reverse=True
-        )
+        # Skip files without any risk indicator, so the file limit goes to reviewable code
+        risky_files = [item for item in code_files.items() if _RISK_INDICATOR_RE.search(item[1])]
+        if len(risky_files) < len(code_files):
+            print(f"[Security] Skipping {len(code_files) - len(risky_files)} files with no risky constructs")
         
-        # Limit files for performance (top priority files)
-        files_to_analyze = sorted_files[:max_files]
+        # Limit files for performance to the top priority files (backend, auth, database files first);
+        # nlargest keeps the same stable order as a full sort without sorting every file
+        if max_files is None:
+            files_to_analyze = sorted(risky_files, key=_file_priority, reverse=True)
+        else:
+            files_to_analyze = heapq.nlargest(max_files, risky_files, key=_file_priority)
         
         print(f"[Security] Analyzing {len(files_to_analyze)} files (batched for performance)...")
         
-        # Batch files together - analyze 10 files at a time in one Claude call
-        batch_size = 10
-        for batch_idx in range(0, len(files_to_analyze), batch_size):
-            batch_files = files_to_analyze[batch_idx:batch_idx + batch_size]
-            
-            # Combine files into one context
-            combined_context = ""
-            for file_path, content in batch_files:
-                # Truncate large files
-                truncated_content = content[:5000] if len(content) > 5000 else content
-                combined_context += f"\n\n### File: {file_path}\n```\n{truncated_content}\n```"
+        # Reuse findings for files whose content was analyzed before
+        pending_files = []
+        for file_path, content in files_to_analyze:
+            cached = self._cache.get(self._cache_key(content, 'batch'))
+            if cached is None:
+                pending_files.append((file_path, content))
+            else:
+                all_findings.extend({**finding, 'file_path': file_path} for finding in cached)
+        
+        if len(pending_files) < len(files_to_analyze):
+            print(f"[Security] Reusing cached findings for {len(files_to_analyze) - len(pending_files)} unchanged files")
+        
+        # Send only one copy of files that differ at most in whitespace at line ends
+        unique_count = len(pending_files)
+        pending_contents = dict(pending_files)
+        pending_files, duplicates = self._group_duplicates(pending_files)
+        if duplicates:
+            print(f"[Security] Skipping {unique_count - len(pending_files)} duplicate files")
+        
+        # Batch files together - pack files into one Claude call up to a character budget,
+        # so many small files share a request instead of a fixed 10 per call
+        batches = []
+        parts = []
+        batch_files = []
+        batch_chars = 0
+        for file_path, content in pending_files:
+            if len(content) <= _MAX_FILE_CHARS_FOR_LLM:
+                part = f"\n\n### File: {file_path}\n```\n{content}\n```"
+            else:
+                # Large files are excerpted, keeping security-relevant lines first
+                part = (
+                    f"\n\n### File: {file_path} (excerpt, lines prefixed with their line numbers)\n"
+                    f"```\n{_excerpt_for_prompt(content)}\n```"
+                )
             
-            print(f"[Security] Batch {batch_idx//batch_size + 1}/{(len(files_to_analyze) + batch_size - 1)//batch_size}: Analyzing {len(batch_files)} files...")
+            if batch_files and (batch_chars + len(part) > _MAX_BATCH_CHARS or len(batch_files) >= _MAX_BATCH_FILES):
+                batches.append((''.join(parts), batch_files))
+                parts, batch_files, batch_chars = [], [], 0
             
-            # Analyze batch with Claude
-            try:
-                findings = self._analyze_batch(combined_context, [f[0] for f in batch_files])
-                all_findings.extend(findings)
-            except Exception as e:
-                print(f"[Security] Batch analysis error: {e}")
+            parts.append(part)
+            batch_files.append((file_path, content))
+            batch_chars += len(part)
+        
+        if batch_files:
+            batches.append((''.join(parts), batch_files))
+        
+        for batch_number, (_, batch_files) in enumerate(batches, start=1):
+            print(f"[Security] Batch {batch_number}/{len(batches)}: Analyzing {len(batch_files)} files...")
+        
+        # Claude calls are network-bound, so run the batches concurrently
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(_MAX_CONCURRENT_BATCHES, len(batches))) as executor:
+                futures = [
+                    executor.submit(self._analyze_batch, combined_context, [f[0] for f in batch_files])
+                    for combined_context, batch_files in batches
+                ]
+                # Collect in submission order so findings keep the file priority order
+                for (_, batch_files), future in zip(batches, futures):
+                    try:
+                        findings = future.result()
+                    except Exception as e:
+                        print(f"[Security] Batch analysis error: {e}")
+                        continue
+                    
+                    all_findings.extend(findings)
+                    self._cache_batch_findings(batch_files, findings, duplicates, pending_contents)
+                    
+                    # Copy each finding onto duplicates of the file it was reported for
+                    for finding in findings:
+                        for duplicate_path in duplicates.get(finding.get('file_path'), ()):
+                            all_findings.append({**finding, 'file_path': duplicate_path})
         
         print(f"[Security] ✅ Found {len(all_findings)} security issues across {len(files_to_analyze)} files")
         return all_findings
     
+    def _group_duplicates(self, files):
+        """
+        Collapse files whose content differs at most in line endings or trailing
+        whitespace onto a single representative. Line numbers are unaffected, so
+        the representative's findings apply to every duplicate as-is.
+        
+        Args:
+            files: List of (file_path, content) tuples
+            
+        Returns:
+            tuple: (list of unique (file_path, content), dict of {representative_path: [duplicate_paths]})
+        """
+        representatives = {}
+        unique_files = []
+        duplicates = {}
+        
+        for file_path, content in files:
+            normalized = '\n'.join(line.rstrip() for line in content.splitlines())
+            digest = blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+            
+            representative = representatives.get(digest)
+            if representative is None:
+                representatives[digest] = file_path
+                unique_files.append((file_path, content))
+            else:
+                duplicates.setdefault(representative, []).append(file_path)
+        
+        return unique_files, duplicates
+    
+    def _cache_key(self, content, prompt):
+        """
+        Cache key for findings on identical content analyzed by the same model.
+        
+        Args:
+            content: File content
+            prompt: 'file' for the full-file prompt, 'batch' for the (possibly excerpted) batch prompt
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        return f"{self.claude_service.model}:{prompt}:{blake2b(data).hexdigest()}"
+    
+    def _cache_batch_findings(self, batch_files, findings, duplicates, contents):
+        """
+        Store a batch's findings per file, keyed by file content; duplicates of a
+        file are cached under their own content with the same findings.
+        
+        An empty result may mean the Claude call or parse failed, and findings for
+        paths outside the batch cannot be attributed, so neither case is cached.
+        
+        Args:
+            batch_files: List of (file_path, content) pairs sent in the batch
+            findings: Findings returned for the batch
+            duplicates: Dict of {representative_path: [duplicate_paths]}
+            contents: Dict of {file_path: content} covering the duplicate paths
+        """
+        if not findings:
+            return
+        
+        findings_by_path = {file_path: [] for file_path, _ in batch_files}
+        for finding in findings:
+            file_findings = findings_by_path.get(finding.get('file_path'))
+            if file_findings is None:
+                return
+            file_findings.append({key: value for key, value in finding.items() if key != 'file_path'})
+        
+        for file_path, content in batch_files:
+            self._cache.set(self._cache_key(content, 'batch'), findings_by_path[file_path])
+            for duplicate_path in duplicates.get(file_path, ()):
+                self._cache.set(self._cache_key(contents[duplicate_path], 'batch'), findings_by_path[file_path])
+    
     def _analyze_batch(self, combined_context, file_paths):
         """Analyze a batch of files together."""
-        prompt = f"""Analyze these code files for security vulnerabilities:
-
-{combined_context}
-
-Find security issues in ANY of these files and return a JSON array. For each vulnerability:
-
-{{
-  "file_path": "exact path from above",
-  "severity": "critical|high|medium|low|info",
-  "category": "SQL Injection|XSS|Auth|etc",
-  "title": "Brief title",
-  "description": "What's the issue",
-  "line_number": line number or null,
-  "recommendation": "How to fix"
-}}
-
-Return ONLY the JSON array, no other text."""
+        prompt = f"""{_BATCH_INSTRUCTIONS}
 
+{combined_context}"""
+        
         try:
             response = self.claude_service.generate_completion(
                 prompt=prompt,
@@ -139,41 +424,8 @@ Return ONLY the JSON array, no other text."""
             list: List of finding dicts
         """
         try:
-            # Try to extract JSON from response
-            response = claude_response.strip()
-            
-            # Remove markdown code blocks
-            if '```json' in response.lower():
-                # Find the json code block
-                start_marker = response.lower().find('```json')
-                start = response.find('\n', start_marker) + 1
-                end = response.find('```', start)
-                if end == -1:
-                    end = len(response)
-                response = response[start:end].strip()
-            elif '```' in response:
-                # Find any code block
-                start = response.find('```') + 3
-                # Skip language identifier if present
-                newline_pos = response.find('\n', start)
-                if newline_pos != -1 and newline_pos - start < 20:
-                    start = newline_pos + 1
-                end = response.find('```', start)
-                if end == -1:
-                    end = len(response)
-                response = response[start:end].strip()
-            
-            # Try to find JSON array
-            if '[' in response:
-                start = response.find('[')
-                end = response.rfind(']') + 1
-                response = response[start:end]
-            
-            # Clean up any remaining non-JSON text
-            response = response.strip()
-            
-            # Parse JSON
-            findings = json.loads(response)
+            # Parse JSON, stopping at the end of the first complete value
+            findings = _extract_findings_array(claude_response)
             
             if not isinstance(findings, list):
                 print(f"Warning: Expected list, got {type(findings)}")
@@ -191,7 +443,6 @@ Return ONLY the JSON array, no other text."""
         except json.JSONDecodeError as e:
             print(f"JSON parse error: {e}")
             print(f"Response (first 500 chars): {claude_response[:500]}")
-            print(f"Attempted to parse: {response[:500] if 'response' in locals() else 'N/A'}")
             return []
         except Exception as e:
             print(f"Error parsing findings: {e}")
@@ -204,11 +455,15 @@ Return ONLY the JSON array, no other text."""
         Validate that finding has required fields.
         
         Args:
-            finding: Finding dict
+            finding: Finding dict (any other value is invalid)
             
         Returns:
             bool: True if valid
         """
+        # Skip stray non-object items instead of failing the whole batch
+        if not isinstance(finding, dict):
+            return False
+        
         required = ['severity', 'title', 'description', 'recommendation', 'category']
         
         for field in required:
@@ -235,20 +490,13 @@ Return ONLY the JSON array, no other text."""
         if not findings:
             return 100
         
-        # Deduct points based on severity
+        # Deduct points based on severity; every penalty is positive, so stop once the score bottoms out
+        get_penalty = _SEVERITY_PENALTIES.get
         score = 100
-        severity_penalties = {
-            'critical': 20,
-            'high': 10,
-            'medium': 5,
-            'low': 2,
-            'info': 1,
-        }
-        
         for finding in findings:
-            penalty = severity_penalties.get(finding.get('severity', 'info'), 1)
-            score -= penalty
+            score -= get_penalty(finding.get('severity', 'info'), 1)
+            if score <= 0:
+                return 0
         
-        # Ensure score is between 0 and 100
-        return max(0, min(100, score))
+        return score
 
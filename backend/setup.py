@@ -4,6 +4,7 @@ Helps initialize the database and verify configuration.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config.database import init_db, test_db_connection
 from config.settings import Config
 
@@ -46,51 +47,66 @@ def setup_database():
         return False
 
 
-def verify_services():
-    """Verify external services are accessible."""
-    print("\n[3/3] Verifying external services...")
-    
-    # Check AWS S3
-    print("  - Checking AWS S3 access...")
+def _check_s3():
+    """Check AWS S3 access. Returns a list of report lines."""
     try:
         from services.s3_service import S3Service
         s3 = S3Service()
         # Try to list objects (should work even if bucket is empty)
         s3.list_files("")
-        print("  [SUCCESS] AWS S3 accessible")
+        return ["  [SUCCESS] AWS S3 accessible"]
     except Exception as e:
-        print(f"  [WARNING] AWS S3 check failed: {e}")
-        print("     Make sure AWS credentials and bucket name are correct")
-    
-    # Check Claude API
-    print("  - Checking Claude API access...")
+        return [
+            f"  [WARNING] AWS S3 check failed: {e}",
+            "     Make sure AWS credentials and bucket name are correct"
+        ]
+
+
+def _check_claude():
+    """Check Claude API access. Returns a list of report lines."""
     try:
         from services.claude_service import ClaudeService
         claude = ClaudeService()
         # Try a simple completion
         response = claude.generate_completion("Say 'API test successful'", max_tokens=10)
         if response:
-            print("  [SUCCESS] Claude API accessible")
-        else:
-            print("  [WARNING] Claude API returned empty response")
+            return ["  [SUCCESS] Claude API accessible"]
+        return ["  [WARNING] Claude API returned empty response"]
     except Exception as e:
-        print(f"  [WARNING] Claude API check failed: {e}")
-        print("     Make sure CLAUDE_API_KEY is correct and has credits")
-    
-    # Check OpenAI API
-    print("  - Checking OpenAI API access...")
+        return [
+            f"  [WARNING] Claude API check failed: {e}",
+            "     Make sure CLAUDE_API_KEY is correct and has credits"
+        ]
+
+
+def _check_openai():
+    """Check OpenAI API access. Returns a list of report lines."""
     try:
         from services.embedding_service import EmbeddingService
         embedder = EmbeddingService()
         # Try creating a simple embedding
         embedding = embedder.create_embedding("test")
         if embedding and len(embedding) > 0:
-            print("  [SUCCESS] OpenAI API accessible")
-        else:
-            print("  [WARNING] OpenAI API returned invalid embedding")
+            return ["  [SUCCESS] OpenAI API accessible"]
+        return ["  [WARNING] OpenAI API returned invalid embedding"]
     except Exception as e:
-        print(f"  [WARNING] OpenAI API check failed: {e}")
-        print("     Make sure OPENAI_API_KEY is correct")
+        return [
+            f"  [WARNING] OpenAI API check failed: {e}",
+            "     Make sure OPENAI_API_KEY is correct"
+        ]
+
+
+def verify_services():
+    """Verify external services are accessible."""
+    print("\n[3/3] Verifying external services...")
+    print("  - Checking AWS S3, Claude API and OpenAI API access...")
+    
+    # Checks are independent network round trips, so run them concurrently
+    checks = (_check_s3, _check_claude, _check_openai)
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [executor.submit(check) for check in checks]
+        for future in as_completed(futures):
+            print("\n".join(future.result()))
     
     return True
 
@@ -8,10 +8,18 @@ Usage:
 
 import json
 import argparse
+import re
 import boto3
 from botocore.exceptions import ClientError
 
 
+# One KEY=VALUE line of a .env file; a value wrapped in matching quotes is unquoted
+_ENV_LINE_RE = re.compile(
+    r"""^[ \t]*([^#\s=][^=\n]*?)[ \t]*=[ \t]*(?:"(.*)"|'(.*)'|(.*?))[ \t\r]*$""",
+    re.MULTILINE
+)
+
+
 def load_env_file(env_file_path):
     """
     Load environment variables from .env file.
@@ -22,29 +30,19 @@ def load_env_file(env_file_path):
     Returns:
         dict: Environment variables as key-value pairs
     """
-    secrets = {}
-    
     with open(env_file_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            # Skip empty lines and comments
-            if not line or line.startswith('#'):
-                continue
-            
-            # Parse KEY=VALUE
-            if '=' in line:
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Remove quotes if present
-                if value.startswith('"') and value.endswith('"'):
-                    value = value[1:-1]
-                elif value.startswith("'") and value.endswith("'"):
-                    value = value[1:-1]
-                
-                secrets[key] = value
+        text = f.read()
+    
+    # Parse KEY=VALUE lines in one pass; comments and blank lines never match
+    secrets = {}
+    for match in _ENV_LINE_RE.finditer(text):
+        key, double_quoted, single_quoted, bare = match.groups()
+        if double_quoted is not None:
+            secrets[key] = double_quoted
+        elif single_quoted is not None:
+            secrets[key] = single_quoted
+        else:
+            secrets[key] = bare
     
     return secrets
 
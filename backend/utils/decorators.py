@@ -2,12 +2,49 @@
 Decorators for route protection and error handling.
 """
 
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify
 import jwt
+import threading
+import time
 from config.settings import Config
 
 
+# Recently verified tokens, so repeat requests skip the signature check
+_TOKEN_CACHE_MAX_ENTRIES = 10000
+_TOKEN_CACHE_TTL_SECONDS = 300  # Also bounds how long a token outlives a secret rotation
+_token_cache = OrderedDict()  # token -> (user_id, valid_until)
+_token_cache_lock = threading.Lock()
+
+
+def _token_cache_get(token):
+    """Get the user_id of a recently verified, unexpired token, or None."""
+    with _token_cache_lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return entry[0]
+
+
+def _token_cache_set(token, user_id, payload):
+    """Cache a verified token until its expiry, for at most _TOKEN_CACHE_TTL_SECONDS."""
+    valid_until = time.time() + _TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get('exp')
+    if isinstance(exp, (int, float)):
+        valid_until = min(valid_until, exp)
+    
+    with _token_cache_lock:
+        _token_cache[token] = (user_id, valid_until)
+        _token_cache.move_to_end(token)
+        if len(_token_cache) > _TOKEN_CACHE_MAX_ENTRIES:
+            _token_cache.popitem(last=False)
+
+
 def require_auth(f):
     """
     Decorator to protect routes with JWT authentication.
@@ -41,6 +78,11 @@ def require_auth(f):
             
             token = parts[1]
             
+            # Tokens verified moments ago skip the signature check (expiry still applies)
+            user_id = _token_cache_get(token)
+            if user_id is not None:
+                return f(user_id=user_id, *args, **kwargs)
+            
             # Decode JWT token
             payload = jwt.decode(
                 token,
@@ -56,6 +98,8 @@ def require_auth(f):
                     'error': 'Invalid token payload'
                 }), 401
             
+            _token_cache_set(token, user_id, payload)
+            
             # Pass user_id to the route function
             return f(user_id=user_id, *args, **kwargs)
             
@@ -0,0 +1,167 @@
+"""
+Simple persistent key-value cache backed by the standard library's sqlite3.
+Used to skip repeated Claude analysis of unchanged content across runs.
+Values are stored as JSON, so a tampered cache file can't run code when read.
+"""
+
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+
+# Writes between sweeps of expired and excess entries
+_PRUNE_EVERY_WRITES = 1000
+
+# Seconds a connection waits for another process's write lock before giving up
+_BUSY_TIMEOUT_SECONDS = 30
+
+# One open connection and lock per cache file, shared by every DiskCache on that path
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _Store:
+    """Open sqlite connection for one cache file, guarded by a lock."""
+    
+    def __init__(self, path):
+        """
+        Open (and create if needed) the cache database.
+        
+        Args:
+            path: Database file path
+        """
+        self.lock = threading.Lock()
+        self.writes = 0
+        
+        # Shared across threads, so serialize access with self.lock; WAL lets processes read while one writes
+        self.conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SECONDS, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value BLOB NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS cache_stored_at ON cache (stored_at)')
+
+
+def _directory_is_private(directory):
+    """
+    Check a cache directory is a real directory (not a symlink) that only this user can access.
+    
+    Ownership can't be checked where os.getuid is missing, so only the type is checked there.
+    """
+    try:
+        dir_stat = os.lstat(directory)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(dir_stat.st_mode):
+        return False
+    if not hasattr(os, 'getuid'):
+        return True
+    return dir_stat.st_uid == os.getuid() and not dir_stat.st_mode & 0o077
+
+
+def _get_store(path):
+    """Get the shared store for a cache file, opening it on first use."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = _Store(path)
+        return store
+
+
+class DiskCache:
+    """
+    Persistent cache with per-entry expiry and a size bound.
+    Thread-safe implementation using a lock per cache file; sqlite locks across processes.
+    """
+    
+    def __init__(self, directory, namespace, ttl_seconds=30 * 24 * 3600, max_entries=200000):
+        """
+        Initialize cache location, expiry and size bound.
+        
+        Args:
+            directory: Base directory for cache files
+            namespace: Cache file name within the directory
+            ttl_seconds: Seconds before an entry expires (default: 30 days)
+            max_entries: Entries kept after a sweep; the oldest are dropped beyond this
+        """
+        self._path = os.path.join(directory, f"{namespace}.sqlite3")
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._disabled = False
+        
+        # A cache that can't be created, or that other users could read or plant files in,
+        # just turns into a no-op
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        except OSError as e:
+            print(f"Cache disabled, cannot create {directory}: {e}")
+            self._disabled = True
+            return
+        
+        if not _directory_is_private(directory):
+            print(f"Cache disabled, {directory} is not a private directory (expected owner-only, mode 0700)")
+            self._disabled = True
+    
+    def get(self, key):
+        """
+        Get a cached value.
+        
+        Args:
+            key: Cache key string
+        
+        Returns:
+            Cached value, or None if missing, expired, or unreadable
+        """
+        if self._disabled:
+            return None
+        
+        try:
+            store = _get_store(self._path)
+            with store.lock:
+                row = store.conn.execute(
+                    'SELECT value FROM cache WHERE key = ? AND stored_at >= ?',
+                    (key, time.time() - self._ttl_seconds)
+                ).fetchone()
+            
+            return json.loads(row[0]) if row is not None else None
+        except Exception as e:
+            print(f"Cache read error: {e}")
+            return None
+    
+    def set(self, key, value):
+        """
+        Store a value in the cache.
+        
+        Args:
+            key: Cache key string
+            value: JSON-serializable value to store
+        """
+        if self._disabled:
+            return
+        
+        try:
+            data = json.dumps(value, separators=(',', ':'))
+            store = _get_store(self._path)
+            with store.lock:
+                store.conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, stored_at, value) VALUES (?, ?, ?)',
+                    (key, time.time(), data)
+                )
+                store.writes += 1
+                if store.writes % _PRUNE_EVERY_WRITES == 0:
+                    self._prune(store.conn)
+        except Exception as e:
+            print(f"Cache write error: {e}")
+    
+    def _prune(self, conn):
+        """Delete expired entries, then the oldest entries beyond max_entries (caller holds the lock)."""
+        conn.execute('DELETE FROM cache WHERE stored_at < ?', (time.time() - self._ttl_seconds,))
+        conn.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+            (self._max_entries,)
+        )
@@ -3,10 +3,19 @@ Helper utility functions.
 """
 
 import uuid
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime
 import re
 
 
+# Sentence boundary used by chunk_text (period followed by a space)
+_SENTENCE_END_RE = re.compile(r'\. ')
+
+# Owner and repository name in a github.com URL
+_GITHUB_URL_RE = re.compile(r'github\.com/([^/]+)/([^/]+)')
+
+
 def generate_uuid():
     """Generate a UUID string."""
     return str(uuid.uuid4())
@@ -40,12 +49,13 @@ def parse_github_url(url):
     if not url:
         return None, None
     
-    # Remove trailing slash and .git
-    url = url.rstrip('/').rstrip('.git')
+    # Remove trailing slash and .git (rstrip('.git') would also eat trailing '.', 'g', 'i', 't')
+    url = url.rstrip('/')
+    if url.endswith('.git'):
+        url = url[:-4]
     
     # Match github.com URLs
-    pattern = r'github\.com/([^/]+)/([^/]+)'
-    match = re.search(pattern, url)
+    match = _GITHUB_URL_RE.search(url)
     
     if match:
         return match.group(1), match.group(2)
@@ -53,6 +63,26 @@ def parse_github_url(url):
     return None, None
 
 
+# Source file extension -> language name
+_LANGUAGE_EXTENSIONS = {
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.jsx': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.tsx': 'TypeScript',
+    '.java': 'Java',
+    '.cpp': 'C++',
+    '.c': 'C',
+    '.cs': 'C#',
+    '.php': 'PHP',
+    '.rb': 'Ruby',
+    '.go': 'Go',
+    '.rs': 'Rust',
+    '.swift': 'Swift',
+    '.kt': 'Kotlin',
+}
+
+
 def detect_language(files):
     """
     Detect primary programming language from file list.
@@ -63,40 +93,20 @@ def detect_language(files):
     Returns:
         str: Primary language or 'Multiple'
     """
-    extensions = {
-        '.py': 'Python',
-        '.js': 'JavaScript',
-        '.jsx': 'JavaScript',
-        '.ts': 'TypeScript',
-        '.tsx': 'TypeScript',
-        '.java': 'Java',
-        '.cpp': 'C++',
-        '.c': 'C',
-        '.cs': 'C#',
-        '.php': 'PHP',
-        '.rb': 'Ruby',
-        '.go': 'Go',
-        '.rs': 'Rust',
-        '.swift': 'Swift',
-        '.kt': 'Kotlin',
-    }
-    
-    # Count file extensions
-    counts = {}
-    for file_path in files:
-        ext = file_path[file_path.rfind('.'):].lower() if '.' in file_path else ''
-        if ext in extensions:
-            lang = extensions[ext]
-            counts[lang] = counts.get(lang, 0) + 1
+    # Count file extensions (without a dot, rfind's -1 slices off only the last
+    # character, which never matches an extension)
+    get_language = _LANGUAGE_EXTENSIONS.get
+    counts = Counter(filter(None, (
+        get_language(file_path[file_path.rfind('.'):].lower()) for file_path in files
+    )))
     
     if not counts:
         return 'Unknown'
     
     # Return most common language
-    max_lang = max(counts, key=counts.get)
+    (max_lang, max_count), = counts.most_common(1)
     
     # If multiple languages with similar counts, return 'Multiple'
-    max_count = counts[max_lang]
     similar_langs = [l for l, c in counts.items() if c > max_count * 0.7 and l != max_lang]
     
     if similar_langs:
@@ -120,6 +130,9 @@ def chunk_text(text, max_chunk_size=1000, overlap=100):
     if len(text) <= max_chunk_size:
         return [text]
     
+    # Sentence boundaries ('. ' positions) found once, then binary-searched per chunk
+    sentence_ends = [match.start() for match in _SENTENCE_END_RE.finditer(text)]
+    
     chunks = []
     start = 0
     
@@ -128,8 +141,9 @@ def chunk_text(text, max_chunk_size=1000, overlap=100):
         
         # If not the last chunk, try to break at sentence or word boundary
         if end < len(text):
-            # Look for sentence boundary
-            sentence_end = text.rfind('. ', start, end)
+            # Look for the last sentence boundary that ends within the chunk
+            idx = bisect_right(sentence_ends, end - 2)
+            sentence_end = sentence_ends[idx - 1] if idx else -1
             if sentence_end > start + max_chunk_size // 2:
                 end = sentence_end + 1
             else:
@@ -142,4 +156,3 @@ def chunk_text(text, max_chunk_size=1000, overlap=100):
         start = end - overlap if end < len(text) else len(text)
     
     return chunks
-
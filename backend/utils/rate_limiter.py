@@ -5,25 +5,56 @@ Limit: 5 attempts per 6 hours
 """
 
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import deque
 import threading
+import time
+
+# Independent lock stripes; a login only waits on others that hash to the same stripe
+_SHARD_COUNT = 32
 
 
 class LoginRateLimiter:
     """
     In-memory rate limiter for login attempts.
-    Thread-safe implementation using locks.
+    Thread-safe implementation using a lock per shard of keys.
     """
     
     def __init__(self):
-        """Initialize rate limiter with empty tracking dict and lock."""
-        # Structure: {email:ip: [(timestamp1, timestamp2, ...)]}
-        self._attempts = defaultdict(list)
-        self._lock = threading.Lock()
+        """Initialize rate limiter with empty tracking shards and their locks."""
+        # Each shard: ({email:ip: deque([timestamp1, timestamp2, ...])}, lock), oldest first
+        # Timestamps are time.monotonic() seconds, so wall clock changes don't shift windows
+        self._shards = [({}, threading.Lock()) for _ in range(_SHARD_COUNT)]
         
         # Rate limit configuration
         self.MAX_ATTEMPTS = 5
         self.LOCKOUT_HOURS = 6
+        self._lockout_seconds = self.LOCKOUT_HOURS * 3600
+        
+        # Expired entries are swept by a background thread so memory stays bounded
+        self._stop_cleanup = threading.Event()
+        self._start_cleanup_thread()
+    
+    def _start_cleanup_thread(self):
+        """Start the daemon thread that periodically removes expired attempts."""
+        thread = threading.Thread(target=self._cleanup_loop, name='login-rate-limiter-cleanup', daemon=True)
+        thread.start()
+    
+    def _cleanup_loop(self):
+        """Run cleanup_old_attempts every half lockout period until stopped."""
+        interval = self._lockout_seconds / 2
+        while not self._stop_cleanup.wait(interval):
+            try:
+                self.cleanup_old_attempts()
+            except Exception as e:
+                print(f"Rate limiter cleanup error: {e}")
+    
+    def stop_cleanup(self):
+        """Stop the background cleanup thread."""
+        self._stop_cleanup.set()
+    
+    def _shard(self, key):
+        """Get the (attempts dict, lock) shard that owns a key."""
+        return self._shards[hash(key) % _SHARD_COUNT]
     
     def is_rate_limited(self, email, ip_address):
         """
@@ -36,20 +67,24 @@ class LoginRateLimiter:
         Returns:
             tuple: (is_limited: bool, attempts_remaining: int, reset_time: datetime or None)
         """
-        with self._lock:
-            key = f"{email}:{ip_address}"
-            attempts = self._attempts[key]
+        key = f"{email}:{ip_address}"
+        store, lock = self._shard(key)
+        with lock:
+            attempts = store.get(key)
+            if not attempts:
+                return False, self.MAX_ATTEMPTS, None
             
-            # Remove attempts older than 6 hours
-            cutoff_time = datetime.now() - timedelta(hours=self.LOCKOUT_HOURS)
-            attempts = [attempt_time for attempt_time in attempts if attempt_time > cutoff_time]
-            self._attempts[key] = attempts
+            # Remove attempts older than 6 hours (timestamps are in order, so only from the front)
+            now = time.monotonic()
+            cutoff_time = now - self._lockout_seconds
+            while attempts and attempts[0] <= cutoff_time:
+                attempts.popleft()
             
             # Check if rate limited
             if len(attempts) >= self.MAX_ATTEMPTS:
-                # Find the oldest attempt to calculate when it expires
-                oldest_attempt = min(attempts)
-                reset_time = oldest_attempt + timedelta(hours=self.LOCKOUT_HOURS)
+                # The oldest attempt is at the front; the lockout ends when it expires
+                seconds_until_reset = attempts[0] - cutoff_time
+                reset_time = datetime.now() + timedelta(seconds=seconds_until_reset)
                 return True, 0, reset_time
             
             # Not rate limited
@@ -64,9 +99,14 @@ class LoginRateLimiter:
             email: User email address
             ip_address: IP address of the request
         """
-        with self._lock:
-            key = f"{email}:{ip_address}"
-            self._attempts[key].append(datetime.now())
+        key = f"{email}:{ip_address}"
+        store, lock = self._shard(key)
+        with lock:
+            attempts = store.get(key)
+            if attempts is None:
+                # Only the newest MAX_ATTEMPTS timestamps can affect the limit
+                attempts = store[key] = deque(maxlen=self.MAX_ATTEMPTS)
+            attempts.append(time.monotonic())
     
     def clear_attempts(self, email, ip_address):
         """
@@ -76,33 +116,33 @@ class LoginRateLimiter:
             email: User email address
             ip_address: IP address of the request
         """
-        with self._lock:
-            key = f"{email}:{ip_address}"
-            if key in self._attempts:
-                del self._attempts[key]
+        key = f"{email}:{ip_address}"
+        store, lock = self._shard(key)
+        with lock:
+            store.pop(key, None)
     
     def cleanup_old_attempts(self):
         """
         Cleanup attempts older than lockout period.
-        Should be called periodically to free memory.
+        Called periodically by the background cleanup thread to free memory.
         """
-        with self._lock:
-            cutoff_time = datetime.now() - timedelta(hours=self.LOCKOUT_HOURS)
-            
-            # Clean up old attempts
-            keys_to_remove = []
-            for key, attempts in self._attempts.items():
-                # Filter out old attempts
-                recent_attempts = [t for t in attempts if t > cutoff_time]
+        cutoff_time = time.monotonic() - self._lockout_seconds
+        
+        # Each shard is cleaned under its own lock, so logins elsewhere are not blocked
+        for store, lock in self._shards:
+            with lock:
+                keys_to_remove = []
+                for key, attempts in store.items():
+                    # Drop expired attempts from the front
+                    while attempts and attempts[0] <= cutoff_time:
+                        attempts.popleft()
+                    
+                    if not attempts:
+                        keys_to_remove.append(key)
                 
-                if recent_attempts:
-                    self._attempts[key] = recent_attempts
-                else:
-                    keys_to_remove.append(key)
-            
-            # Remove empty entries
-            for key in keys_to_remove:
-                del self._attempts[key]
+                # Remove empty entries
+                for key in keys_to_remove:
+                    del store[key]
     
     def get_stats(self):
         """
@@ -111,16 +151,19 @@ class LoginRateLimiter:
         Returns:
             dict: Statistics about current rate limiting state
         """
-        with self._lock:
-            total_tracked = len(self._attempts)
-            total_attempts = sum(len(attempts) for attempts in self._attempts.values())
-            
-            return {
-                'tracked_users': total_tracked,
-                'total_attempts': total_attempts,
-                'max_attempts_allowed': self.MAX_ATTEMPTS,
-                'lockout_hours': self.LOCKOUT_HOURS
-            }
+        total_tracked = 0
+        total_attempts = 0
+        for store, lock in self._shards:
+            with lock:
+                total_tracked += len(store)
+                total_attempts += sum(len(attempts) for attempts in store.values())
+        
+        return {
+            'tracked_users': total_tracked,
+            'total_attempts': total_attempts,
+            'max_attempts_allowed': self.MAX_ATTEMPTS,
+            'lockout_hours': self.LOCKOUT_HOURS
+        }
 
 
 # Global rate limiter instance
@@ -4,8 +4,192 @@ AWS Secrets Manager utility for retrieving secrets in production.
 
 import json
 import os
-import boto3
-from botocore.exceptions import ClientError
+import stat
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from hashlib import blake2b
+
+# orjson is optional - decodes secret payloads faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON decoder for secret payloads (accepts str or bytes)
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Messages for GetSecretValue error codes (others are reported with the raw error)
+_CLIENT_ERROR_MESSAGES = {
+    'DecryptionFailureException': "Secrets Manager can't decrypt the secret using the provided KMS key",
+    'InternalServiceErrorException': "Internal service error from AWS Secrets Manager",
+    'InvalidParameterException': "Invalid parameter provided to AWS Secrets Manager",
+    'InvalidRequestException': "Invalid request to AWS Secrets Manager",
+    'ResourceNotFoundException': "Secret '{secret_name}' not found in AWS Secrets Manager",
+}
+
+# BatchGetSecretValue accepts at most 20 secret ids per request
+_BATCH_GET_MAX_SECRETS = 20
+
+# Fetched secrets are cached in memory so repeat lookups skip the AWS round trip
+# (TTL in seconds; 0 disables)
+_SECRETS_CACHE_TTL = int(os.environ.get('CODEDOCS_SECRETS_TTL', '300'))
+
+# Opt-in: also keep secrets in owner-only files so restarts skip the round trip.
+# Off by default, since it writes plaintext secrets to disk
+_SECRETS_FILE_CACHE = os.environ.get('CODEDOCS_SECRETS_FILE_CACHE', '').lower() in ('1', 'true', 'yes')
+_SECRETS_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or tempfile.gettempdir(),
+    f"codedocs-secrets-{os.getuid() if hasattr(os, 'getuid') else 'user'}"
+)
+
+# Refuse to follow a symlink planted at a cache file path (0 where unsupported)
+_O_NOFOLLOW = getattr(os, 'O_NOFOLLOW', 0)
+
+# In-process copies: {(secret_name, region_name): (time.monotonic() when fetched, secret dict)}
+_secret_memory_cache = {}
+_secret_memory_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _get_secrets_client(region_name):
+    """
+    Get the Secrets Manager client for a region, creating it on first use.
+    
+    Client construction loads service models and resolves credentials, so one
+    client per region is shared by every call (boto3 clients are thread-safe).
+    """
+    # Import here so boto3's startup cost is only paid when AWS is actually used
+    import boto3
+    
+    session = boto3.session.Session()
+    return session.client(
+        service_name='secretsmanager',
+        region_name=region_name
+    )
+
+
+def _secret_cache_path(secret_name, region_name):
+    """Cache file for a secret; the name is hashed so it never appears on disk."""
+    digest = blake2b(f"{region_name}:{secret_name}".encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_SECRETS_CACHE_DIR, f"{digest}.json")
+
+
+def _secret_cache_dir_is_private():
+    """
+    Check the cache directory is a real directory (not a symlink) owned by this user with mode 0700.
+    
+    File caching is skipped where ownership can't be checked (no os.getuid).
+    """
+    if not hasattr(os, 'getuid'):
+        return False
+    try:
+        dir_stat = os.lstat(_SECRETS_CACHE_DIR)
+    except OSError:
+        return False
+    return (stat.S_ISDIR(dir_stat.st_mode) and dir_stat.st_uid == os.getuid()
+            and stat.S_IMODE(dir_stat.st_mode) == 0o700)
+
+
+def _remove_expired_secret_files():
+    """Delete cache files, and temp files left by interrupted writes, older than the TTL."""
+    cutoff = time.time() - _SECRETS_CACHE_TTL
+    try:
+        with os.scandir(_SECRETS_CACHE_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        pass
+
+
+def _secret_cache_get(secret_name, region_name):
+    """
+    Get a fresh cached secret, from memory or else from its owner-only cache file (if enabled).
+    
+    Returns:
+        dict: Secret key-value pairs (a copy the caller may modify), or None on a miss
+    """
+    if _SECRETS_CACHE_TTL <= 0:
+        return None
+    
+    key = (secret_name, region_name)
+    with _secret_memory_cache_lock:
+        entry = _secret_memory_cache.get(key)
+    if entry is not None:
+        fetched_at, secret = entry
+        if time.monotonic() - fetched_at <= _SECRETS_CACHE_TTL:
+            return dict(secret)
+    
+    if not _SECRETS_FILE_CACHE or not _secret_cache_dir_is_private():
+        return None
+    
+    path = _secret_cache_path(secret_name, region_name)
+    try:
+        with open(os.open(path, os.O_RDONLY | _O_NOFOLLOW), 'rb') as f:
+            # Check the opened file itself, so it can't be swapped after the check
+            file_stat = os.fstat(f.fileno())
+            
+            # Ignore files another user could have written or read
+            if file_stat.st_uid != os.getuid() or file_stat.st_mode & 0o077:
+                return None
+            age = time.time() - file_stat.st_mtime
+            secret = _json_loads(f.read()) if age <= _SECRETS_CACHE_TTL else None
+    except (OSError, ValueError):
+        return None
+    
+    if secret is None:
+        # Expired: remove it rather than leave the secret on disk
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return None
+    
+    # Keep the file's age so the in-memory copy expires with it
+    with _secret_memory_cache_lock:
+        _secret_memory_cache[key] = (time.monotonic() - age, secret)
+    return dict(secret)
+
+
+def _secret_cache_set(secret_name, region_name, secret):
+    """Cache a secret in memory and, if enabled, atomically in its owner-only cache file (file failures are ignored)."""
+    if _SECRETS_CACHE_TTL <= 0:
+        return
+    
+    with _secret_memory_cache_lock:
+        _secret_memory_cache[(secret_name, region_name)] = (time.monotonic(), dict(secret))
+    
+    if not _SECRETS_FILE_CACHE:
+        return
+    
+    temp_path = None
+    try:
+        os.makedirs(_SECRETS_CACHE_DIR, mode=0o700, exist_ok=True)
+        if not _secret_cache_dir_is_private():
+            print(f"⚠️  Not caching secret locally: {_SECRETS_CACHE_DIR} is not a private directory")
+            return
+        
+        _remove_expired_secret_files()
+        
+        # mkstemp creates a new file exclusively with mode 0600
+        fd, temp_path = tempfile.mkstemp(dir=_SECRETS_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(secret, f)
+        os.replace(temp_path, _secret_cache_path(secret_name, region_name))
+        temp_path = None
+    except OSError as e:
+        print(f"⚠️  Could not cache secret locally: {e}")
+    finally:
+        if temp_path is not None:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
 
 
 def get_secret(secret_name="codedocs-ai", region_name="us-east-1"):
@@ -19,53 +203,116 @@ def get_secret(secret_name="codedocs-ai", region_name="us-east-1"):
     Returns:
         dict: Secret key-value pairs
     """
-    # Create a Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
+    # Reuse a recently fetched copy (warm restarts)
+    cached = _secret_cache_get(secret_name, region_name)
+    if cached is not None:
+        return cached
+    
+    # Import here so boto3's startup cost is only paid when AWS is actually used
+    from botocore.exceptions import ClientError
+    
+    # Reuse the region's Secrets Manager client
+    client = _get_secrets_client(region_name)
 
     try:
         get_secret_value_response = client.get_secret_value(
             SecretId=secret_name
         )
     except ClientError as e:
-        # Handle specific error codes
+        # Report specific error codes, then re-raise
         error_code = e.response['Error']['Code']
-        if error_code == 'DecryptionFailureException':
-            # Secrets Manager can't decrypt the protected secret text using the provided KMS key
-            print(f"❌ Secrets Manager can't decrypt the secret using the provided KMS key")
-            raise e
-        elif error_code == 'InternalServiceErrorException':
-            # An error occurred on the server side
-            print(f"❌ Internal service error from AWS Secrets Manager")
-            raise e
-        elif error_code == 'InvalidParameterException':
-            # Invalid parameter in request
-            print(f"❌ Invalid parameter provided to AWS Secrets Manager")
-            raise e
-        elif error_code == 'InvalidRequestException':
-            # Invalid request to AWS Secrets Manager
-            print(f"❌ Invalid request to AWS Secrets Manager")
-            raise e
-        elif error_code == 'ResourceNotFoundException':
-            # Secret not found
-            print(f"❌ Secret '{secret_name}' not found in AWS Secrets Manager")
-            raise e
-        else:
+        message = _CLIENT_ERROR_MESSAGES.get(error_code)
+        if message is None:
             print(f"❌ Error retrieving secret: {e}")
-            raise e
+        else:
+            print(f"❌ {message.format(secret_name=secret_name)}")
+        raise
+    else:
+        secret = _parse_secret_value(get_secret_value_response)
+        _secret_cache_set(secret_name, region_name, secret)
+        return secret
+
+
+def _parse_secret_value(secret_value):
+    """
+    Parse the JSON payload of a secret value returned by Secrets Manager.
+    
+    Args:
+        secret_value: GetSecretValue response, or one BatchGetSecretValue entry
+        
+    Returns:
+        dict: Secret key-value pairs
+    """
+    # Decrypts secret using the associated KMS key
+    if 'SecretString' in secret_value:
+        secret = secret_value['SecretString']
+        return _json_loads(secret)
     else:
-        # Decrypts secret using the associated KMS key
-        if 'SecretString' in get_secret_value_response:
-            secret = get_secret_value_response['SecretString']
-            return json.loads(secret)
+        # Binary secret (not common for environment variables)
+        import base64
+        decoded_binary_secret = base64.b64decode(secret_value['SecretBinary'])
+        return _json_loads(decoded_binary_secret)
+
+
+def get_secrets_batch(secret_names, region_name="us-east-1"):
+    """
+    Retrieve several secrets from AWS Secrets Manager in as few requests as possible.
+    
+    Args:
+        secret_names: List of secret names (or ARNs)
+        region_name: AWS region where the secrets are stored
+        
+    Returns:
+        dict: {secret_name: secret key-value pairs}
+        
+    Raises:
+        Exception: If any secret could not be retrieved
+    """
+    # Only secrets without a fresh local copy are requested
+    secrets = {}
+    missing = []
+    for name in secret_names:
+        cached = _secret_cache_get(name, region_name)
+        if cached is None:
+            missing.append(name)
         else:
-            # Binary secret (not common for environment variables)
-            import base64
-            decoded_binary_secret = base64.b64decode(get_secret_value_response['SecretBinary'])
-            return json.loads(decoded_binary_secret)
+            secrets[name] = cached
+    
+    if not missing:
+        return secrets
+    
+    client = _get_secrets_client(region_name)
+    
+    # BatchGetSecretValue needs botocore >= 1.34; older clients fetch one secret per request
+    if not hasattr(client, 'batch_get_secret_value'):
+        secrets.update((name, get_secret(name, region_name)) for name in missing)
+        return secrets
+    
+    errors = []
+    for start in range(0, len(missing), _BATCH_GET_MAX_SECRETS):
+        batch = missing[start:start + _BATCH_GET_MAX_SECRETS]
+        kwargs = {'SecretIdList': batch}
+        
+        while True:
+            response = client.batch_get_secret_value(**kwargs)
+            
+            for secret_value in response.get('SecretValues', []):
+                # Report under the id the caller asked for (name or ARN)
+                name = secret_value['ARN'] if secret_value['ARN'] in batch else secret_value['Name']
+                secrets[name] = _parse_secret_value(secret_value)
+                _secret_cache_set(name, region_name, secrets[name])
+            errors.extend(response.get('Errors', []))
+            
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+    
+    if errors:
+        for error in errors:
+            print(f"❌ Error retrieving secret '{error.get('SecretId')}': {error.get('ErrorCode')} {error.get('Message', '')}")
+        raise Exception(f"Failed to retrieve {len(errors)} of {len(secret_names)} secrets")
+    
+    return secrets
 
 
 def load_secrets_to_env(secret_name="codedocs-ai", region_name="us-east-1"):
@@ -73,19 +320,27 @@ def load_secrets_to_env(secret_name="codedocs-ai", region_name="us-east-1"):
     Load secrets from AWS Secrets Manager and set them as environment variables.
     
     Args:
-        secret_name: Name of the secret in AWS Secrets Manager
+        secret_name: Name of the secret in AWS Secrets Manager, or a list of names
+                     fetched in one batch (later secrets override earlier keys)
         region_name: AWS region where secret is stored
     """
     try:
         print(f"🔐 Loading secrets from AWS Secrets Manager: '{secret_name}'...")
-        secrets = get_secret(secret_name, region_name)
+        if isinstance(secret_name, str):
+            secrets = get_secret(secret_name, region_name)
+        else:
+            secret_names = list(secret_name)
+            batch = get_secrets_batch(secret_names, region_name)
+            secrets = {}
+            for name in secret_names:
+                secrets.update(batch[name])
         
         # Set each secret as an environment variable
         for key, value in secrets.items():
-            os.environ[key] = str(value)
-            print(f"✅ Loaded: {key}")
+            os.environ[key] = value if isinstance(value, str) else str(value)
         
-        print(f"✅ Successfully loaded {len(secrets)} secrets from AWS Secrets Manager")
+        # One summary line instead of a write per secret
+        print(f"✅ Successfully loaded {len(secrets)} secrets from AWS Secrets Manager: {', '.join(secrets)}")
         return True
         
     except Exception as e:
@@ -94,10 +349,14 @@ def load_secrets_to_env(secret_name="codedocs-ai", region_name="us-east-1"):
         return False
 
 
+@lru_cache(maxsize=1)
 def is_production():
     """
     Check if running in production environment.
     
+    The environment is read once per process; call is_production.cache_clear()
+    after changing the indicator variables (e.g. in tests).
+    
     Returns:
         bool: True if production, False otherwise
     """
@@ -4,9 +4,30 @@ Validation utilities for input data.
 
 import re
 import os
+import string
 from config.settings import Config
 
 
+# Extension whitelist frozen once at import for O(1) membership checks
+_ALLOWED_EXTENSIONS = frozenset(Config.ALLOWED_EXTENSIONS)
+
+# Per-file upload limit in bytes (Config is fixed after import)
+_MAX_FILE_SIZE = Config.MAX_FILE_SIZE
+
+# Longest valid email address (RFC 5321 path limit minus the angle brackets)
+_MAX_EMAIL_LENGTH = 254
+
+# Email address (local part, domain, TLD of 2+ letters)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# github.com repository URL (owner and repository name, any trailing slashes)
+_GITHUB_URL_RE = re.compile(r'https?://github\.com/[\w-]+/[\w.-]+/*')
+
+# Password strength character classes (checked with set.isdisjoint rather than a regex scan)
+_PASSWORD_UPPER_CHARS = frozenset(string.ascii_uppercase)
+_PASSWORD_SPECIAL_CHARS = frozenset('!@#$%^&*(),.?":{}|<>_-+=[]\\;/`~')
+
+
 def validate_email(email):
     """
     Validate email address format.
@@ -17,11 +38,11 @@ def validate_email(email):
     Returns:
         bool: True if valid, False otherwise
     """
-    if not email:
+    # Cheap rejections first; RFC 5321 caps addresses at 254 characters, bounding regex work
+    if not email or len(email) > _MAX_EMAIL_LENGTH or '@' not in email:
         return False
     
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 
 def validate_password(password):
@@ -42,16 +63,29 @@ def validate_password(password):
         return False, "Password must be at least 12 characters long"
     
     # Check for at least one uppercase letter
-    if not re.search(r'[A-Z]', password):
+    if _PASSWORD_UPPER_CHARS.isdisjoint(password):
         return False, "Password must contain at least one uppercase letter"
     
     # Check for at least one special symbol
-    if not re.search(r'[!@#$%^&*(),.?":{}|<>_\-+=\[\]\\;/`~]', password):
+    if _PASSWORD_SPECIAL_CHARS.isdisjoint(password):
         return False, "Password must contain at least one special symbol (!@#$%^&* etc.)"
     
     return True, None
 
 
+def file_extension(filename):
+    """
+    Get a file's lowercased extension, the part checked against the whitelist.
+    
+    Args:
+        filename: File name or path
+        
+    Returns:
+        str: Extension with its leading dot (e.g. '.py'), or '' if there is none
+    """
+    return os.path.splitext(filename)[1].lower()
+
+
 def validate_file_extension(filename):
     """
     Check if file extension is allowed.
@@ -65,8 +99,7 @@ def validate_file_extension(filename):
     if not filename:
         return False
     
-    ext = os.path.splitext(filename)[1].lower()
-    return ext in Config.ALLOWED_EXTENSIONS
+    return file_extension(filename) in _ALLOWED_EXTENSIONS
 
 
 def validate_file_size(file_size):
@@ -79,7 +112,7 @@ def validate_file_size(file_size):
     Returns:
         bool: True if size is acceptable
     """
-    return file_size <= Config.MAX_FILE_SIZE
+    return file_size <= _MAX_FILE_SIZE
 
 
 def validate_github_url(url):
@@ -96,8 +129,7 @@ def validate_github_url(url):
         return False
     
     # Match github.com URLs
-    pattern = r'^https?://github\.com/[\w-]+/[\w.-]+/?$'
-    return bool(re.match(pattern, url.rstrip('/')))
+    return bool(_GITHUB_URL_RE.fullmatch(url))
 
 
 def validate_project_name(name):
@@ -110,10 +142,12 @@ def validate_project_name(name):
     Returns:
         tuple: (is_valid, error_message)
     """
-    if not name or not name.strip():
+    # Surrounding whitespace doesn't count toward the minimum; the maximum applies to the stored value
+    stripped = name.strip() if name else ''
+    if not stripped:
         return False, "Project name is required"
     
-    if len(name) < 2:
+    if len(stripped) < 2:
         return False, "Project name must be at least 2 characters"
     
     if len(name) > 255: